@@ -1,18 +1,27 @@
+import logging
 import streamlit as st
-from retriever import get_pubmed_articles
-from embedder import create_faiss_index, search_similar_documents
-from qa_chain import generate_answer
+
+# Configure logging before the model modules are imported (embedder logs its warmup at import)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+from retriever import get_pubmed_articles, create_session
+import pubmed_cache
+from embedder import create_faiss_index, search_similar_documents, get_embedding_model
+from qa_chain import (generate_answer_stream, generate_article_summaries, get_qa_pipeline, needs_generated_answer,
+                      load_in_background, load_summarizer_pipeline, SUMMARIZER_BATCH_SIZE)
+import faiss
+import numpy as np
+import asyncio
+import threading
 import traceback
 
-# Configure Streamlit page
-st.set_page_config(
-    page_title="MedQuery: Clinical Decision Support",
-    page_icon="🩺",
-    layout="wide"
-)
+logger = logging.getLogger('medquery.app')
 
-# Custom CSS for better styling
-st.markdown("""
+# Default for the "Max articles to retrieve" slider (also used for prewarming)
+DEFAULT_MAX_ARTICLES = 5
+
+# Static page content, defined once at import instead of rebuilt inline on every rerun
+CSS_BLOCK = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -57,7 +66,198 @@ st.markdown("""
         color: #2e7d32;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+DISCLAIMER_HTML = """
+<div class="warning-box">
+⚠️ <strong>Medical Disclaimer:</strong> This tool is for informational purposes only and should not replace professional medical advice, diagnosis, or treatment. Always consult qualified healthcare professionals for clinical decisions.
+</div>
+"""
+
+RELEVANCE_INTRO_HTML = """
+<div style="background-color: #f0f8ff; padding: 1rem; border-radius: 0.5rem; margin: 1rem 0; border-left: 4px solid #4CAF50;">
+<strong> About Relevance Scores:</strong> These scores (0.0-1.0) indicate how well each article matches your query using semantic similarity. 
+Higher scores mean better matches. Our AI considers title relevance, abstract content, and keyword matching to rank articles.
+<em>Click the expandable section below for detailed scoring methodology.</em>
+</div>
+"""
+
+METHODOLOGY_MD = """
+### 🎯 How We Calculate Relevance Scores
+
+Our system uses **two complementary scoring methods** to find the most relevant articles:
+
+---
+
+#### 🔍 **Step 1: PubMed Retrieval Scoring** *(If using improved retriever)*
+
+When fetching articles, we score them based on:
+
+1. **🎯 Exact Query Match** *(Highest Priority)*
+   - **Title match**: +10.0 points if your exact query appears in the article title
+   - **Abstract match**: +5.0 points if found in the abstract
+
+2. **🏥 Medical Terms** *(High Priority)*
+   - **Title**: +3.0 points per medical term (e.g., "type 2 diabetes", "first-line treatment")
+   - **Abstract**: +1.5 points per medical term
+
+3. **🔤 Individual Keywords** *(Medium Priority)*
+   - **Title words**: +2.0 points per matching word from your query
+   - **Abstract words**: +0.5 points per matching word
+
+4. **📄 Content Quality** *(Base Priority)*
+   - **Has abstract**: +1.0 point (articles with abstracts are more informative)
+   - **Recent publication**: +0.5 points (newer guidelines and findings)
+
+---
+
+#### 🧠 **Step 2: AI Semantic Similarity** *(Final Ranking)*
+
+The **Relevance Scores** you see (0.0-1.0) come from our AI semantic analysis:
+
+- **AI Embeddings**: We convert your query and each article into high-dimensional vectors
+- **Semantic Matching**: We measure how "close" the meanings are in this vector space
+- **Cosine Similarity**: Scored as the cosine between normalized vectors, where:
+  - **0.8-1.0**: Extremely relevant - perfect semantic match
+  - **0.6-0.8**: Highly relevant - strong semantic similarity  
+  - **0.4-0.6**: Moderately relevant - some semantic overlap
+  - **0.2-0.4**: Weakly relevant - limited semantic connection
+  - **0.0-0.2**: Minimally relevant - very different topics
+
+---
+
+#### 🏆 **Why This Two-Step Approach?**
+
+1. **Step 1** ensures we get articles that contain your specific medical terms
+2. **Step 2** ensures we understand the *meaning* and *context* of your question
+3. **Combined**: You get articles that are both keyword-relevant AND semantically meaningful
+
+#### 💡 **Example for Query: *"What are the first-line treatments for type 2 diabetes?"***
+
+- **High Score (0.85)**: *"Metformin as first-line therapy for type 2 diabetes mellitus"*
+- **Medium Score (0.62)**: *"Comparative effectiveness of diabetes medications in adults"*  
+- **Lower Score (0.34)**: *"Insulin resistance mechanisms in metabolic syndrome"*
+
+**This dual scoring system ensures you get the most clinically relevant evidence for your question! 🎯**
+"""
+
+FOOTER_HTML = """
+<div style="text-align: center; color: #666; margin-top: 2rem;">
+    🚀 <strong>Enhanced with AI Summaries</strong> | Built with ❤️ for healthcare professionals | Data from PubMed/NCBI
+</div>
+"""
+
+# Configure Streamlit page
+st.set_page_config(
+    page_title="MedQuery: Clinical Decision Support",
+    page_icon="🩺",
+    layout="wide"
+)
+
+# Custom CSS for better styling
+st.markdown(CSS_BLOCK, unsafe_allow_html=True)
+
+def summary_html(summary: str) -> str:
+    """Render an article summary box"""
+    return f"""
+    <div class="summary-box">
+     <strong>Summary:</strong> {summary}
+    </div>
+    """
+
+@st.cache_data(show_spinner=False)
+def methodology():
+    """Relevance-scoring methodology markdown for the explainer expander"""
+    return METHODOLOGY_MD
+
+@st.cache_resource(show_spinner=False)
+def pubmed_client():
+    """Shared keep-alive HTTP session for NCBI E-utilities (one per server process)"""
+    return create_session()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_pubmed(query: str, max_articles: int):
+    """Cached PubMed retrieval so reruns on the same query skip the network"""
+    return get_pubmed_articles(query, max_results=max_articles, client=pubmed_client())
+
+@st.cache_resource(show_spinner=False)
+def build_index(pmids: tuple, _articles: list):
+    """
+    Cached FAISS index build keyed on the PMID tuple (articles list is not hashed)
+    
+    New sessions reuse the embedder's on-disk caches (see embedder_cache): the
+    per-text embedding cache always, and the FAISS index cache only for corpora
+    of SMALL_INDEX_MAX_DOCS (64) or more, which the app's <= 15 articles never reach.
+    """
+    return create_faiss_index(_articles)
+
+def normalize_query(query: str) -> str:
+    """Normalize case/whitespace so "Metformin " and "metformin" share one pipeline run"""
+    return " ".join(query.lower().split())
+
+def prewarm(questions: list):
+    """Fetch and index the example questions so the first click hits the caches"""
+    for question in questions:
+        try:
+            # Same key the pipeline looks up for an example-button click
+            articles = cached_pubmed(normalize_query(question), DEFAULT_MAX_ARTICLES)
+            if articles:
+                build_index(tuple(a['pmid'] for a in articles), articles)
+        except Exception as e:
+            logger.warning("⚠️ Prewarm failed for '%s': %s", question, e)
+    logger.info("✅ Example questions prewarmed")
+
+@st.cache_resource(show_spinner=False)
+def start_prewarm(questions: tuple):
+    """Start the prewarm thread once per server process"""
+    thread = threading.Thread(target=prewarm, args=(list(questions),), daemon=True)
+    thread.start()
+    return thread
+
+async def run_pipeline(query: str, max_articles: int, top_k: int, rerank: bool, report):
+    """
+    Run retrieval -> embedding -> search, overlapping independent stages
+    
+    Returns (articles, index, similar_docs); later items are None/empty
+    when an earlier stage produced nothing. The answer is streamed separately.
+    """
+    # Step 1: PubMed fetch is network-bound, so load the models alongside it
+    # (short factual questions never run the QA model, so don't wait for it).
+    # The answer streams without the summarizer, so its load is not awaited here:
+    # qa_chain already started it at import (MEDQUERY_PREWARM), and this only
+    # resubmits it when prewarm is off or the load failed; the summary step
+    # after the answer waits for it
+    report("🔍 Searching PubMed database and loading models...")
+    load_in_background(load_summarizer_pipeline)
+    loads = [
+        asyncio.to_thread(cached_pubmed, query, max_articles),
+        asyncio.to_thread(get_embedding_model),
+    ]
+    if needs_generated_answer(query):
+        loads.append(asyncio.to_thread(get_qa_pipeline))
+    articles = (await asyncio.gather(*loads))[0]
+    if not articles:
+        return articles, None, []
+    
+    # Step 2: Create embeddings and search index
+    report("🧠 Creating semantic embeddings...")
+    index, metadatas, texts = await asyncio.to_thread(
+        build_index, tuple(a['pmid'] for a in articles), articles
+    )
+    if index is None or len(texts) == 0:
+        return articles, None, []
+    
+    # Step 3: Search for most relevant documents
+    report("🎯 Finding most relevant evidence...")
+    if rerank:
+        # The cross-encoder pass is CPU-heavy, keep it off the event loop
+        similar_docs = await asyncio.to_thread(
+            search_similar_documents, index, metadatas, texts, query, k=top_k, rerank=True
+        )
+    else:
+        similar_docs = search_similar_documents(index, metadatas, texts, query, k=top_k)
+    
+    return articles, index, similar_docs
 
 # Main title
 st.markdown('<h1 class="main-header">🩺 MedQuery: Evidence-Based Clinical Decision Support</h1>', unsafe_allow_html=True)
@@ -88,9 +288,19 @@ with st.sidebar:
         "Antibiotic resistance in pneumonia"
     ]
     
+    # Warm the PubMed and index caches for the examples in the background
+    start_prewarm(tuple(example_questions))
+    
     for q in example_questions:
         if st.button(q, key=f"example_{hash(q)}"):
             st.session_state.query = q
+    
+    st.markdown("### Cache")
+    if st.button("Clear cache", key="clear_cache"):
+        cached_pubmed.clear()
+        build_index.clear()
+        pubmed_cache.clear()
+        st.success("Cached PubMed results cleared")
 
 # Initialize session state
 if 'query' not in st.session_state:
@@ -109,198 +319,145 @@ query = st.text_input(
 with st.expander("⚙️ Advanced Options"):
     col1, col2 = st.columns(2)
     with col1:
-        max_articles = st.slider("Max articles to retrieve", 3, 15, 5)
+        max_articles = st.slider("Max articles to retrieve", 3, 15, DEFAULT_MAX_ARTICLES)
     with col2:
         top_k = st.slider("Top results to analyze", 2, 5, 3)
+    rerank = st.checkbox(
+        "Rerank results with a cross-encoder",
+        value=False,
+        help="More precise relevance ordering at the cost of a short extra model pass"
+    )
+
+q_norm = normalize_query(query)
 
 # Main processing
-if query:
+if q_norm:
     try:
-        # Initialize progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Step 1: Retrieve articles from PubMed
-        status_text.text("🔍 Searching PubMed database...")
-        progress_bar.progress(10)
-        
-        with st.spinner("Fetching evidence from PubMed..."):
-            articles = get_pubmed_articles(query, max_results=max_articles)
-        
-        progress_bar.progress(30)
-        
-        if not articles:
-            st.error("❌ No relevant PubMed articles found. Try rephrasing your question or using different keywords.")
-            st.stop()
-        
-        st.success(f"✅ Found {len(articles)} relevant articles")
-        
-        # Step 2: Create embeddings and search index
-        status_text.text("🧠 Creating semantic embeddings...")
-        progress_bar.progress(50)
-        
-        with st.spinner("Processing articles with AI embeddings..."):
-            index, metadatas, texts = create_faiss_index(articles)
-        
-        if index is None or len(texts) == 0:
-            st.error("❌ Failed to create search index. Please try again.")
-            st.stop()
-        
-        progress_bar.progress(70)
-        
-        # Step 3: Search for most relevant documents
-        status_text.text("🎯 Finding most relevant evidence...")
-        
-        with st.spinner("Finding most relevant evidence..."):
-            similar_docs = search_similar_documents(index, metadatas, texts, query, k=top_k)
-        
-        progress_bar.progress(85)
-        
-        if not similar_docs:
-            st.error("❌ No relevant matches found in the retrieved articles.")
-            st.stop()
-        
-        # Step 4: Generate answer with summaries
-        status_text.text("📝 Generating summaries and evidence-based answer...")
-        
-        with st.spinner("Generating article summaries and evidence-based recommendation..."):
-            result = generate_answer(query, similar_docs)
+        cache_key = (q_norm, max_articles, top_k, rerank)
+        
+        if st.session_state.get('last_key') == cache_key:
+            # UI-only rerun (expander, widget click) - reuse the previous pipeline output
+            articles, similar_docs, result = st.session_state['pipeline']
+            st.success(f"✅ Found {len(articles)} relevant articles")
+        else:
+            # Single status widget whose label tracks the current pipeline step
+            with st.status("Analyzing...", expanded=False) as status:
+                articles, index, similar_docs = asyncio.run(
+                    run_pipeline(q_norm, max_articles, top_k, rerank,
+                                 lambda message: status.update(label=message))
+                )
+                
+                if articles and index is not None and similar_docs:
+                    status.update(label="✅ Evidence retrieved - generating answer...", state="complete")
+                else:
+                    status.update(label="❌ Analysis stopped", state="error")
+            
+            if not articles:
+                st.error("❌ No relevant PubMed articles found. Try rephrasing your question or using different keywords.")
+                st.stop()
+            
+            st.success(f"✅ Found {len(articles)} relevant articles")
+            
+            if index is None:
+                st.error("❌ Failed to create search index. Please try again.")
+                st.stop()
+            
+            if not similar_docs:
+                st.error("❌ No relevant matches found in the retrieved articles.")
+                st.stop()
+            
+            # The answer is filled in once it has finished streaming below
+            result = None
+            st.session_state['pipeline'] = (articles, similar_docs, result)
+            st.session_state['last_key'] = cache_key
+            st.session_state['compact_index'] = isinstance(index, (faiss.IndexIVFPQ, faiss.IndexScalarQuantizer))
         
-        progress_bar.progress(100)
-        status_text.text("✅ Analysis complete!")
+        if st.session_state.get('compact_index'):
+            st.sidebar.info("🗜️ **Compact index**: large corpus searched with a quantized FAISS index")
         
         # Display results
         st.markdown('<h2 class="section-header">🔬 Evidence-Based Recommendation</h2>', unsafe_allow_html=True)
         
-        # Main answer
-        st.markdown(result)
+        # Main answer - stream tokens as they are generated, render from cache on reruns
+        if result is None:
+            # Summaries are produced separately below so they don't delay the answer
+            result = st.write_stream(generate_answer_stream(query, similar_docs, summarize=False))
+            st.session_state['pipeline'] = (articles, similar_docs, result)
+        else:
+            st.markdown(result)
         
         # Medical disclaimer
-        st.markdown("""
-        <div class="warning-box">
-        ⚠️ <strong>Medical Disclaimer:</strong> This tool is for informational purposes only and should not replace professional medical advice, diagnosis, or treatment. Always consult qualified healthcare professionals for clinical decisions.
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(DISCLAIMER_HTML, unsafe_allow_html=True)
+        
+        # Pre-compute per-article view fields in one pass and reuse them in every section below
+        views = [
+            (doc,
+             doc.metadata['title'],
+             doc.metadata.get('pmid', 'Unknown'),
+             doc.metadata['url'],
+             doc.similarity_score,
+             doc.text[:400] + "..." if len(doc.text) > 400 else doc.text)
+            for doc in similar_docs
+        ]
+        # Inner-product scores are cosines already, so stats are plain numpy reductions
+        similarity_scores = np.array([doc.similarity_score for doc in similar_docs], dtype=np.float32)
         
         # Show article summaries in a more prominent way
         st.markdown('<h2 class="section-header"> Quick Article Overview</h2>', unsafe_allow_html=True)
         
-        for i, doc in enumerate(similar_docs, 1):
+        pending_summaries = []
+        
+        for i, (doc, title, pmid, url, score, _) in enumerate(views, 1):
             with st.container():
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.markdown(f"** Article {i}: {doc['metadata']['title']}**")
+                    st.markdown(f"** Article {i}: {title}**")
                 
                 with col2:
-                    score = doc.get('similarity_score', 0)
                     st.markdown(f'<div class="relevance-score">Relevance: {score:.3f}</div>', unsafe_allow_html=True)
                 
-                # Show summary if available (this will be added by the enhanced qa_chain)
-                if 'summary' in doc:
-                    st.markdown(f"""
-                    <div class="summary-box">
-                     <strong>Summary:</strong> {doc['summary']}
-                    </div>
-                    """, unsafe_allow_html=True)
+                # Show summary if already computed, otherwise reserve a slot for it
+                summary_slot = st.empty()
+                if doc.summary is not None:
+                    summary_slot.markdown(summary_html(doc.summary), unsafe_allow_html=True)
+                else:
+                    summary_slot.caption("⏳ Generating summary...")
+                    pending_summaries.append((summary_slot, doc))
                 
                 # Article details
                 col_a, col_b = st.columns(2)
                 with col_a:
-                    st.markdown(f"**PMID:** {doc['metadata'].get('pmid', 'Unknown')}")
+                    st.markdown(f"**PMID:** {pmid}")
                 with col_b:
-                    st.markdown(f"**[📎 View on PubMed]({doc['metadata']['url']})**")
+                    st.markdown(f"**[📎 View on PubMed]({url})**")
                 
                 st.markdown("---")
         
         # Brief explanation of relevance scores
-        st.markdown("""
-        <div style="background-color: #f0f8ff; padding: 1rem; border-radius: 0.5rem; margin: 1rem 0; border-left: 4px solid #4CAF50;">
-        <strong> About Relevance Scores:</strong> These scores (0.0-1.0) indicate how well each article matches your query using semantic similarity. 
-        Higher scores mean better matches. Our AI considers title relevance, abstract content, and keyword matching to rank articles.
-        <em>Click the expandable section below for detailed scoring methodology.</em>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(RELEVANCE_INTRO_HTML, unsafe_allow_html=True)
         
         # Add explanation of relevance scoring
         with st.expander("ℹ️ Understanding Relevance Scores - Detailed Methodology"):
-            st.markdown("""
-            ### 🎯 How We Calculate Relevance Scores
-            
-            Our system uses **two complementary scoring methods** to find the most relevant articles:
-            
-            ---
-            
-            #### 🔍 **Step 1: PubMed Retrieval Scoring** *(If using improved retriever)*
-            
-            When fetching articles, we score them based on:
-            
-            1. **🎯 Exact Query Match** *(Highest Priority)*
-               - **Title match**: +10.0 points if your exact query appears in the article title
-               - **Abstract match**: +5.0 points if found in the abstract
-               
-            2. **🏥 Medical Terms** *(High Priority)*
-               - **Title**: +3.0 points per medical term (e.g., "type 2 diabetes", "first-line treatment")
-               - **Abstract**: +1.5 points per medical term
-               
-            3. **🔤 Individual Keywords** *(Medium Priority)*
-               - **Title words**: +2.0 points per matching word from your query
-               - **Abstract words**: +0.5 points per matching word
-               
-            4. **📄 Content Quality** *(Base Priority)*
-               - **Has abstract**: +1.0 point (articles with abstracts are more informative)
-               - **Recent publication**: +0.5 points (newer guidelines and findings)
-            
-            ---
-            
-            #### 🧠 **Step 2: AI Semantic Similarity** *(Final Ranking)*
-            
-            The **Relevance Scores** you see (0.0-1.0) come from our AI semantic analysis:
-            
-            - **AI Embeddings**: We convert your query and each article into high-dimensional vectors
-            - **Semantic Matching**: We measure how "close" the meanings are in this vector space
-            - **Normalized Scoring**: Converted to 0.0-1.0 scale where:
-              - **0.8-1.0**: Extremely relevant - perfect semantic match
-              - **0.6-0.8**: Highly relevant - strong semantic similarity  
-              - **0.4-0.6**: Moderately relevant - some semantic overlap
-              - **0.2-0.4**: Weakly relevant - limited semantic connection
-              - **0.0-0.2**: Minimally relevant - very different topics
-            
-            ---
-            
-            #### 🏆 **Why This Two-Step Approach?**
-            
-            1. **Step 1** ensures we get articles that contain your specific medical terms
-            2. **Step 2** ensures we understand the *meaning* and *context* of your question
-            3. **Combined**: You get articles that are both keyword-relevant AND semantically meaningful
-            
-            #### 💡 **Example for Query: *"What are the first-line treatments for type 2 diabetes?"***
-            
-            - **High Score (0.85)**: *"Metformin as first-line therapy for type 2 diabetes mellitus"*
-            - **Medium Score (0.62)**: *"Comparative effectiveness of diabetes medications in adults"*  
-            - **Lower Score (0.34)**: *"Insulin resistance mechanisms in metabolic syndrome"*
-            
-            **This dual scoring system ensures you get the most clinically relevant evidence for your question! 🎯**
-            """)
+            st.markdown(methodology())
             
             
         
         # Show detailed retrieved articles 
         with st.expander("📚 Detailed Article Information"):
-            for i, doc in enumerate(similar_docs, 1):
+            for i, (doc, title, pmid, url, score, snippet) in enumerate(views, 1):
                 with st.container():
                     st.markdown(f"### 📖 Article {i}")
-                    st.markdown(f"**Title:** {doc['metadata']['title']}")
-                    st.markdown(f"**Similarity Score:** {doc['similarity_score']:.3f}")
-                    st.markdown(f"**PMID:** {doc['metadata'].get('pmid', 'Unknown')}")
-                    st.markdown(f"**URL:** {doc['metadata']['url']}")
+                    st.markdown(f"**Title:** {title}")
+                    st.markdown(f"**Similarity Score:** {score:.3f}")
+                    st.markdown(f"**PMID:** {pmid}")
+                    st.markdown(f"**URL:** {url}")
                     
                     # Show snippet of text
-                    snippet = doc['text'][:400] + "..." if len(doc['text']) > 400 else doc['text']
                     st.markdown(f"**Abstract Preview:**")
-                    st.text_area("", snippet, height=100, key=f"abstract_{i}")
+                    st.text_area("", snippet, height=100, key=f"abstract_{doc.metadata.get('pmid') or i}")
                     
-                    if i < len(similar_docs):
+                    if i < len(views):
                         st.markdown("---")
         
         # Show search statistics
@@ -311,16 +468,26 @@ if query:
             with col2:
                 st.metric("Articles Analyzed", len(similar_docs))
             with col3:
-                avg_similarity = sum(d['similarity_score'] for d in similar_docs) / len(similar_docs)
+                avg_similarity = similarity_scores.mean()
                 st.metric("Average Similarity", f"{avg_similarity:.3f}")
             with col4:
                 # Show relevance scores from improved retriever if available
                 if 'relevance_score' in articles[0]:
-                    avg_relevance = sum(a.get('relevance_score', 0) for a in articles) / len(articles)
+                    avg_relevance = np.fromiter((a.get('relevance_score', 0) for a in articles),
+                                                dtype=np.float32, count=len(articles)).mean()
                     st.metric("Average Relevance", f"{avg_relevance:.3f}")
                 else:
                     st.metric("Processing Time", "< 30s")
         
+        # Fill in summaries one batched model call at a time (concurrent generate()
+        # calls would just compete for the same cores); they are stored on the docs,
+        # so reruns render them straight from session_state
+        for start in range(0, len(pending_summaries), SUMMARIZER_BATCH_SIZE):
+            batch = pending_summaries[start:start + SUMMARIZER_BATCH_SIZE]
+            generate_article_summaries([doc for _, doc in batch])
+            for slot, doc in batch:
+                slot.markdown(summary_html(doc.summary), unsafe_allow_html=True)
+        
     except Exception as e:
         st.error(f"❌ An error occurred: {str(e)}")
         with st.expander("Error Details (for debugging)"):
@@ -328,11 +495,7 @@ if query:
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #666; margin-top: 2rem;">
-    🚀 <strong>Enhanced with AI Summaries</strong> | Built with ❤️ for healthcare professionals | Data from PubMed/NCBI
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 # # only give defination for relevance score
 # import streamlit as st
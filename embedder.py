@@ -1,21 +1,280 @@
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, CrossEncoder
 import faiss
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+import torch
+from typing import List, Dict, Tuple, Optional, Union
+import functools
+import logging
+from dataclasses import dataclass
 import os
+from embedder_cache import text_key, get_cached, put_cached, load_index, save_index
+
+# ONNX Runtime backend for CPU encoding (optional dependency: optimum[onnxruntime])
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger('medquery.embedder')
 
 # Global model to avoid reloading
 _model = None
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+ONNX_MODEL_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+ONNX_MAX_LENGTH = 256
+
+# Optional cross-encoder rerank of the FAISS candidates
+_reranker = None
+RERANKER_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+RERANK_CANDIDATES = 20
+
+# MiniLM-L6 is small enough that larger batches fill the CPU/GPU better
+EMBEDDING_BATCH_SIZE = 64
+
+# MiniLM truncates at 256 tokens anyway; cutting the string first saves tokenizer work
+EMBEDDING_MAX_CHARS = 1500
+
+# Below this size a plain numpy GEMV beats the FAISS call overhead
+SMALL_INDEX_MAX_DOCS = 64
+
+# Below this size an exact flat scan is as fast as a graph search
+FLAT_INDEX_MAX_DOCS = 1024
+
+# HNSW graph parameters (neighbours per node, build/search beam widths)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# Int8 scalar-quantized index (4x smaller than fp32) from this size up
+SQ8_INDEX_MIN_DOCS = 4096
+
+# Product-quantized IVF index for large corpora (64-byte codes per vector)
+COMPACT_INDEX_MIN_DOCS = 50000
+PQ_M = 64
+PQ_NBITS = 8
+IVF_NPROBE = 16
+
+@dataclass(slots=True)
+class SearchHit:
+    """A single retrieved document (summary is filled in later by qa_chain/app)"""
+    rank: int
+    similarity_score: float  # Cosine similarity
+    text: str
+    metadata: Dict
+    rerank_score: Optional[float] = None
+    summary: Optional[str] = None
+
+class SmallIndex:
+    """
+    Exact inner-product search in numpy for tiny corpora
+    
+    Mirrors the parts of the FAISS index API used here (ntotal, search) so
+    search_similar_documents treats it like any other index.
+    """
+    
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = embeddings
+        self.ntotal = len(embeddings)
+    
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, indices) of the top k per query, best first, -1 padded"""
+        scores = queries @ self.embeddings.T
+        kk = min(k, self.ntotal)
+        
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        if kk < k:
+            # Pad like FAISS does when k exceeds the corpus size
+            pad = k - kk
+            top = np.pad(top, ((0, 0), (0, pad)), constant_values=-1)
+            top_scores = np.pad(top_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        
+        return top_scores, top
+
+class OnnxEmbedder:
+    """
+    MiniLM-L6 exported to ONNX and run with ONNX Runtime
+    
+    Provides the encode() call used in this module: tokenize, one session run
+    per batch, masked mean-pooling and L2 normalization in numpy. Returns the
+    same (n, 384) float32 embeddings as SentenceTransformer.
+    """
+    
+    def __init__(self, model_id: str):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+    
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Encode texts into L2-normalized float32 vectors (extra kwargs are ignored)"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=ONNX_MAX_LENGTH, return_tensors='np')
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        
+        embeddings = np.ascontiguousarray(np.concatenate(batches), dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
 
 def get_embedding_model():
-    """Get or load the embedding model"""
+    """Get or load the embedding model (ONNX Runtime on CPU when available)"""
     global _model
     if _model is None:
-        print("🔄 Loading embedding model...")
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("✅ Embedding model loaded")
+        logger.info("🔄 Loading embedding model...")
+        if ONNX_AVAILABLE and not torch.cuda.is_available() and os.environ.get('MEDQUERY_ONNX', '1') == '1':
+            try:
+                _model = OnnxEmbedder(ONNX_MODEL_ID)
+                logger.info("✅ Embedding model loaded (ONNX Runtime)")
+                return _model
+            except Exception as e:
+                logger.warning("⚠️ ONNX export failed, using SentenceTransformer: %s", e)
+        _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        if torch.cuda.is_available():
+            # Half precision halves memory traffic through the transformer
+            _model = _model.to('cuda').half()
+            logger.info("⚡ Embedding model running in fp16 on GPU")
+        logger.info("✅ Embedding model loaded")
     return _model
 
+def configure_threads():
+    """
+    Cap FAISS's OpenMP pool so search doesn't oversubscribe the CPU
+    
+    FAISS gets half the cores (override with MEDQUERY_FAISS_THREADS). PyTorch
+    keeps every core for summarizer/QA generation, the most expensive stage,
+    unless MEDQUERY_TORCH_THREADS is set.
+    """
+    cpu_count = os.cpu_count() or 2
+    try:
+        faiss_threads = int(os.environ.get('MEDQUERY_FAISS_THREADS', cpu_count // 2))
+    except ValueError:
+        logger.warning("⚠️ Invalid MEDQUERY_FAISS_THREADS, using half the CPU cores")
+        faiss_threads = cpu_count // 2
+    faiss_threads = max(1, faiss_threads)
+    faiss.omp_set_num_threads(faiss_threads)
+    
+    torch_threads = os.environ.get('MEDQUERY_TORCH_THREADS')
+    if torch_threads:
+        try:
+            torch.set_num_threads(max(1, int(torch_threads)))
+        except ValueError:
+            logger.warning("⚠️ Invalid MEDQUERY_TORCH_THREADS, keeping the PyTorch default")
+    logger.info("🧵 Threads: %s FAISS, %s PyTorch", faiss_threads, torch.get_num_threads())
+
+def warmup_embedding_model():
+    """Load the embedding model and run one dummy encode (tokenizer/kernel warmup)"""
+    try:
+        encode_normalized(get_embedding_model(), ["warmup"])
+        logger.info("🔥 Embedding model warmed up")
+    except Exception as e:
+        logger.warning("⚠️ Embedding model warmup failed: %s", e)
+
+def get_reranker():
+    """Get or load the cross-encoder reranker"""
+    global _reranker
+    if _reranker is None:
+        logger.info("🔄 Loading reranker model...")
+        _reranker = CrossEncoder(RERANKER_MODEL_NAME)
+        logger.info("✅ Reranker model loaded")
+    return _reranker
+
+def encode_normalized(model, texts: List[str]) -> np.ndarray:
+    """
+    Encode texts into L2-normalized float32 vectors
+    
+    Embeddings stay as tensors on the model's device (fp16 on GPU) and are
+    cast to a contiguous float32 array once, at the FAISS boundary.
+    """
+    emb = model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, show_progress_bar=False,
+                       convert_to_tensor=True, normalize_embeddings=True)
+    if isinstance(emb, torch.Tensor):
+        emb = emb.float().cpu().numpy()
+    return np.ascontiguousarray(emb, dtype=np.float32)
+
+def encode_texts_cached(model, texts: List[str]) -> np.ndarray:
+    """
+    Encode texts, reusing vectors stored in the SQLite embedding cache
+    
+    Only cache misses are sent to the encoder (in a single batched call);
+    their vectors are written back for future queries and restarts.
+    """
+    keys = [text_key(text) for text in texts]
+    cached = get_cached(keys, EMBEDDING_MODEL_NAME)
+    
+    miss_idx = [i for i, key in enumerate(keys) if key not in cached]
+    logger.debug("🗃️ Embedding cache: %s hits, %s misses", len(texts) - len(miss_idx), len(miss_idx))
+    
+    if miss_idx:
+        new_vecs = encode_normalized(model, [texts[i][:EMBEDDING_MAX_CHARS] for i in miss_idx])
+        put_cached([(keys[i], vec) for i, vec in zip(miss_idx, new_vecs)], EMBEDDING_MODEL_NAME)
+        
+        # Nothing cached - the encoder output already is the (n, d) float32 matrix
+        if len(miss_idx) == len(texts):
+            return new_vecs
+        
+        for i, vec in zip(miss_idx, new_vecs):
+            cached[keys[i]] = vec
+    
+    # Fill one preallocated matrix rather than stacking a temporary list of rows
+    dimension = len(next(iter(cached.values())))
+    embeddings = np.empty((len(keys), dimension), dtype=np.float32)
+    for row, key in zip(embeddings, keys):
+        row[:] = cached[key]
+    return embeddings
+
+def build_vector_index(embeddings: np.ndarray) -> Union[faiss.Index, SmallIndex]:
+    """
+    Build a FAISS inner-product index sized to the corpus
+    
+    Args:
+        embeddings: L2-normalized float32 matrix of shape (n, d)
+        
+    Returns:
+        Numpy SmallIndex for tiny corpora, exact flat index for small ones, HNSW for mid-sized ones, an int8
+        scalar-quantized index for large ones and IVF-PQ ("compact") for
+        very large ones
+    """
+    n, dimension = embeddings.shape
+    
+    if n < SMALL_INDEX_MAX_DOCS:
+        return SmallIndex(embeddings)
+    
+    if n < FLAT_INDEX_MAX_DOCS:
+        index = faiss.IndexFlatIP(dimension)
+        index.add(embeddings)
+        return index
+    
+    if n > COMPACT_INDEX_MIN_DOCS and dimension % PQ_M == 0:
+        logger.info("🗜️ Building compact IVF-PQ index...")
+        quantizer = faiss.IndexFlatIP(dimension)
+        nlist = max(1, min(256, n // 40))
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, PQ_M, PQ_NBITS,
+                                 faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        return index
+    
+    if n >= SQ8_INDEX_MIN_DOCS:
+        logger.info("🗜️ Building int8 scalar-quantized index...")
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit,
+                                           faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        return index
+    
+    index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.add(embeddings)
+    return index
+
 def create_faiss_index(docs: List[Dict]) -> Tuple[Optional[faiss.Index], List[Dict], List[str]]:
     """
     Create FAISS index from documents
@@ -27,66 +286,89 @@ def create_faiss_index(docs: List[Dict]) -> Tuple[Optional[faiss.Index], List[Di
         Tuple of (FAISS index, metadata list, text list)
     """
     if not docs:
-        print("❌ No documents provided for indexing")
+        logger.error("❌ No documents provided for indexing")
         return None, [], []
     
-    print(f"📊 Creating FAISS index for {len(docs)} documents...")
+    # Short-circuit on an index already built for this exact PMID set (only FAISS
+    # tiers are persisted, so small corpora always rebuild from cached embeddings)
+    pmids = [str(doc.get('pmid', '')) for doc in docs]
+    if all(pmids):
+        cached_index = load_index(pmids, EMBEDDING_MODEL_NAME)
+        if cached_index is not None:
+            logger.debug("💾 Loaded cached FAISS index for %s documents", len(docs))
+            return cached_index
+    
+    logger.debug("📊 Creating FAISS index for %s documents...", len(docs))
     
     # Extract texts and metadata
-    texts = []
-    metadatas = []
-    
-    for doc in docs:
-        abstract = doc.get('abstract', '').strip()
-        title = doc.get('title', 'No title').strip()
-        
-        # Use both title and abstract for better context
-        if abstract and abstract != "No abstract available":
-            text = f"{title}. {abstract}"
-        else:
-            text = title
-            
-        texts.append(text)
-        metadatas.append({
-            "title": title,
-            "url": doc.get('url', ''),
-            "pmid": doc.get('pmid', '')
-        })
+    titles = [doc.get('title', 'No title').strip() for doc in docs]
+    abstracts = [doc.get('abstract', '').strip() for doc in docs]
+    
+    # Use both title and abstract for better context
+    texts = [f"{title}. {abstract}" if abstract and abstract != "No abstract available" else title
+             for title, abstract in zip(titles, abstracts)]
+    metadatas = [{"title": title, "url": doc.get('url', ''), "pmid": doc.get('pmid', '')}
+                 for title, doc in zip(titles, docs)]
     
     if not texts:
-        print("❌ No valid texts found for embedding")
+        logger.error("❌ No valid texts found for embedding")
         return None, [], []
     
     try:
         # Get embedding model
         model = get_embedding_model()
         
-        # Create embeddings
-        print("🔄 Generating embeddings...")
-        embeddings = model.encode(texts, show_progress_bar=True, batch_size=32)
+        # Create embeddings - cached texts are reused and all misses go to the
+        # encoder in one call, so the retrieved set is embedded in a single forward pass
+        logger.debug("🔄 Generating embeddings...")
+        embeddings = encode_texts_cached(model, texts)
         
         if len(embeddings) == 0:
-            print("❌ No embeddings generated")
+            logger.error("❌ No embeddings generated")
             return None, [], []
         
-        # Create FAISS index
-        print("🔄 Building FAISS index...")
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
+        assert len(embeddings) == len(texts), "Embedder must return one vector per text"
+        
+        # New vectors come back normalized; normalizing again in place is cheap and
+        # covers vectors cached before the encoder normalized them itself.
+        # ascontiguousarray only copies if the input isn't already float32
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
         
-        # Normalize embeddings for better similarity search
-        faiss.normalize_L2(embeddings.astype(np.float32))
-        index.add(embeddings.astype(np.float32))
+        # Create FAISS index - inner product on unit vectors is cosine similarity
+        logger.debug("🔄 Building FAISS index...")
+        index = build_vector_index(embeddings)
         
-        print(f"✅ FAISS index created with {index.ntotal} documents")
+        logger.debug("✅ FAISS index created with %s documents", index.ntotal)
+        # SmallIndex is not a FAISS index; rebuilding it from cached embeddings is cheap
+        if all(pmids) and isinstance(index, faiss.Index):
+            save_index(pmids, EMBEDDING_MODEL_NAME, index, metadatas, texts)
         return index, metadatas, texts
         
     except Exception as e:
-        print(f"❌ Error creating FAISS index: {e}")
+        logger.error("❌ Error creating FAISS index: %s", e)
         return None, [], []
 
+@functools.lru_cache(maxsize=256)
+def encode_query(query: str) -> bytes:
+    """
+    Encode and L2-normalize a query, cached by query string
+    
+    Returns the raw float32 bytes rather than the ndarray so cached entries
+    can never be mutated by callers.
+    """
+    return encode_normalized(get_embedding_model(), [query]).tobytes()
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """Encode a batch of queries into an (nq, d) normalized float32 matrix"""
+    if len(queries) == 1:
+        # Single questions go through the per-query LRU cache
+        return np.frombuffer(encode_query(queries[0]), dtype=np.float32).reshape(1, -1)
+    return encode_normalized(get_embedding_model(), queries)
+
 def search_similar_documents(index: faiss.Index, metadatas: List[Dict], texts: List[str], 
-                           query: str, k: int = 3) -> List[Dict]:
+                           queries: Union[List[str], str], k: int = 3,
+                           rerank: bool = False) -> Union[List[SearchHit], List[List[SearchHit]]]:
     """
     Search for similar documents using the FAISS index
     
@@ -94,39 +376,88 @@ def search_similar_documents(index: faiss.Index, metadatas: List[Dict], texts: L
         index: FAISS index
         metadatas: List of document metadata
         texts: List of document texts
-        query: Search query
-        k: Number of results to return
+        queries: Search query, or a list of queries searched in one batched call
+        k: Number of results to return per query
+        rerank: Re-score RERANK_CANDIDATES FAISS hits with the cross-encoder
+            and keep the best k
         
     Returns:
-        List of similar documents with metadata and similarity scores
+        List of SearchHit results with metadata and similarity scores
+        (one such list per query when a list of queries is given)
     """
-    if index is None or not metadatas:
-        return []
+    single = isinstance(queries, str)
+    if single:
+        queries = [queries]
+    
+    if index is None or not metadatas or not queries:
+        return [] if single else [[] for _ in queries]
     
     try:
-        # Get embedding model and encode query
-        model = get_embedding_model()
-        query_embedding = model.encode([query])
+        # Encode all queries in one forward pass (normalized)
+        query_embeddings = encode_queries(queries)
         
-        # Normalize query embedding
-        faiss.normalize_L2(query_embedding.astype(np.float32))
+        # Search - one FAISS call for the whole (nq, d) batch
+        k_search = max(k, RERANK_CANDIDATES) if rerank else k
+        if hasattr(index, 'hnsw'):
+            index.hnsw.efSearch = max(HNSW_EF_SEARCH, k_search)
+        elif hasattr(index, 'nprobe'):
+            index.nprobe = IVF_NPROBE
+        scores, indices = index.search(query_embeddings, k_search)
         
-        # Search
-        distances, indices = index.search(query_embedding.astype(np.float32), k)
+        # Mask out padding (-1) for the whole batch at once, then gather
+        valid = (indices >= 0) & (indices < len(metadatas))
         
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(metadatas):  # Valid index
-                result = {
-                    'rank': i + 1,
-                    'similarity_score': float(1 / (1 + distance)),  # Convert distance to similarity
-                    'text': texts[idx],
-                    'metadata': metadatas[idx]
-                }
-                results.append(result)
+        all_results = [
+            [
+                SearchHit(rank, score, texts[idx], metadatas[idx])
+                for rank, score, idx in zip((np.flatnonzero(query_valid) + 1).tolist(),
+                                            query_scores[query_valid].tolist(),
+                                            query_indices[query_valid].tolist())
+            ]
+            for query_scores, query_indices, query_valid in zip(scores, indices, valid)
+        ]
         
-        return results
+        if rerank:
+            all_results = rerank_results(queries, all_results, k)
+        
+        return all_results[0] if single else all_results
         
     except Exception as e:
-        print(f"❌ Error during similarity search: {e}")
-        return []
\ No newline at end of file
+        logger.error("❌ Error during similarity search: %s", e)
+        return [] if single else [[] for _ in queries]
+
+def rerank_results(queries: List[str], all_results: List[List[SearchHit]], k: int) -> List[List[SearchHit]]:
+    """
+    Rerank FAISS candidates with the cross-encoder
+    
+    All (query, document) pairs are scored in one batched predict call; each
+    query's candidates are then sorted by that score and truncated to k. The
+    cosine similarity_score is kept and the new score stored as rerank_score.
+    """
+    pairs = [(query, result.text) for query, results in zip(queries, all_results) for result in results]
+    if not pairs:
+        return all_results
+    
+    try:
+        rerank_scores = iter(get_reranker().predict(pairs, show_progress_bar=False).tolist())
+    except Exception as e:
+        logger.warning("⚠️ Reranking failed, keeping FAISS order: %s", e)
+        return [results[:k] for results in all_results]
+    
+    reranked = []
+    for results in all_results:
+        for result in results:
+            result.rerank_score = next(rerank_scores)
+        results = sorted(results, key=lambda r: r.rerank_score, reverse=True)[:k]
+        for rank, result in enumerate(results, 1):
+            result.rank = rank
+        reranked.append(results)
+    
+    return reranked
+
+configure_threads()
+
+# Pay the model load + first-encode cost at import, outside the request path
+# (the module is imported once per process, so Streamlit sessions share it)
+if os.environ.get('MEDQUERY_PREWARM', '1') == '1':
+    warmup_embedding_model()
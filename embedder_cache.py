@@ -0,0 +1,141 @@
+# On-disk caches for the embedder: per-text vectors in SQLite and built FAISS indexes.
+# Only corpora that take a FAISS tier (SMALL_INDEX_MAX_DOCS or more) are persisted as
+# indexes; small corpora use the in-memory SmallIndex, rebuilt from cached vectors.
+import faiss
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+
+logger = logging.getLogger('medquery.embedder')
+
+CACHE_DIR = ".cache"
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite")
+INDEX_CACHE_DIR = os.path.join(CACHE_DIR, "faiss")
+
+# Indexes larger than this are memory-mapped instead of read into RAM
+MMAP_INDEX_MIN_BYTES = 64 * 1024 * 1024
+
+# Keys per IN (...) lookup query
+LOOKUP_CHUNK_SIZE = 500
+
+# Shared SQLite connection (Streamlit serves sessions from several threads)
+_connection = None
+_lock = threading.Lock()
+
+def get_connection() -> sqlite3.Connection:
+    """Get or open the SQLite embedding cache"""
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(EMBEDDING_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "text_sha1 BLOB NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, "
+            "PRIMARY KEY (text_sha1, model))"
+        )
+        conn.commit()
+        _connection = conn
+    return _connection
+
+def text_key(text: str) -> bytes:
+    """Cache key for an embedded text"""
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+def get_cached(keys: List[bytes], model_name: str) -> Dict[bytes, np.ndarray]:
+    """
+    Look up cached embedding vectors
+
+    Returns a dict of key -> float32 vector for the keys that were found.
+    """
+    if not keys:
+        return {}
+
+    try:
+        rows = []
+        with _lock:
+            conn = get_connection()
+            # Chunked so large corpora stay under SQLite's bound-variable limit
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT text_sha1, vec FROM embeddings WHERE model = ? AND text_sha1 IN ({placeholders})",
+                    [model_name, *chunk]
+                ).fetchall())
+        return {bytes(key): np.frombuffer(vec, dtype=np.float32) for key, vec in rows}
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Embedding cache unavailable: %s", e)
+        return {}
+
+def put_cached(items: List[Tuple[bytes, np.ndarray]], model_name: str) -> None:
+    """Store embedding vectors in the cache"""
+    if not items:
+        return
+
+    try:
+        with _lock:
+            conn = get_connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (text_sha1, model, vec) VALUES (?, ?, ?)",
+                [(key, model_name, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items]
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Could not write embedding cache: %s", e)
+
+def index_paths(pmids: List[str], model_name: str) -> Tuple[str, str]:
+    """Index and metadata file paths for a PMID set (order-independent)"""
+    key = hashlib.sha1((model_name + ":" + ",".join(sorted(pmids))).encode()).hexdigest()
+    return (os.path.join(INDEX_CACHE_DIR, f"{key}.index"),
+            os.path.join(INDEX_CACHE_DIR, f"{key}.pkl"))
+
+def load_index(pmids: List[str], model_name: str) -> Optional[Tuple[faiss.Index, List[Dict], List[str]]]:
+    """
+    Load a previously built index for this PMID set
+
+    Returns (index, metadatas, texts), or None on a miss or unreadable files.
+    """
+    index_path, meta_path = index_paths(pmids, model_name)
+    if not (os.path.exists(index_path) and os.path.exists(meta_path)):
+        return None
+
+    try:
+        index = read_index_file(index_path)
+        with open(meta_path, 'rb') as f:
+            metadatas, texts = pickle.load(f)
+        return index, metadatas, texts
+    except Exception as e:
+        logger.warning("⚠️ Error loading cached index, rebuilding: %s", e)
+        return None
+
+def read_index_file(index_path: str) -> faiss.Index:
+    """
+    Read a FAISS index, memory-mapping large ones
+    
+    With mmap the OS page cache serves hot pages and process RSS stays low.
+    Index types that cannot be mapped (e.g. HNSW graphs) are read normally.
+    """
+    if os.path.getsize(index_path) >= MMAP_INDEX_MIN_BYTES:
+        try:
+            return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except Exception as e:
+            logger.warning("⚠️ Could not memory-map index, reading it into memory: %s", e)
+    return faiss.read_index(index_path)
+
+def save_index(pmids: List[str], model_name: str, index: faiss.Index,
+               metadatas: List[Dict], texts: List[str]) -> None:
+    """Persist a FAISS index and its metadata for this PMID set (large corpora only)"""
+    index_path, meta_path = index_paths(pmids, model_name)
+
+    try:
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        faiss.write_index(index, index_path)
+        with open(meta_path, 'wb') as f:
+            pickle.dump((metadatas, texts), f)
+    except Exception as e:
+        logger.warning("⚠️ Could not persist FAISS index: %s", e)
@@ -0,0 +1,108 @@
+# On-disk cache of parsed PubMed search results, keyed by (query, sort, retmax)
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('medquery.retriever')
+
+CACHE_DIR = ".cache"
+SEARCH_CACHE_PATH = os.path.join(CACHE_DIR, "pubmed.sqlite")
+
+# Cached searches are refetched after a day so guidelines stay reasonably fresh
+SEARCH_CACHE_TTL = 24 * 60 * 60
+MEMORY_CACHE_SIZE = 512
+
+# In-process LRU in front of SQLite: key -> (fetched_at, articles)
+_memory_cache = OrderedDict()
+
+# Shared SQLite connection (searches run from several threads)
+_connection = None
+_lock = threading.Lock()
+
+def get_connection() -> sqlite3.Connection:
+    """Get or open the SQLite search cache"""
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(SEARCH_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(SEARCH_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "query TEXT NOT NULL, sort TEXT NOT NULL, retmax INTEGER NOT NULL, "
+            "articles TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (query, sort, retmax))"
+        )
+        conn.commit()
+        _connection = conn
+    return _connection
+
+def get_cached_search(query: str, sort_by: str, retmax: int) -> Optional[List[Dict]]:
+    """
+    Look up the parsed articles of a previous search
+
+    Returns fresh copies of the article dicts, or None on a miss or expired entry.
+    """
+    key = (query, sort_by, retmax)
+    now = time.time()
+
+    try:
+        with _lock:
+            entry = _memory_cache.get(key)
+            if entry is not None:
+                _memory_cache.move_to_end(key)
+            else:
+                row = get_connection().execute(
+                    "SELECT fetched_at, articles FROM searches WHERE query = ? AND sort = ? AND retmax = ?",
+                    key
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (row[0], json.loads(row[1]))
+                remember(key, entry)
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("⚠️ PubMed cache unavailable: %s", e)
+        return None
+
+    fetched_at, articles = entry
+    if now - fetched_at > SEARCH_CACHE_TTL:
+        return None
+    return [dict(article) for article in articles]
+
+def put_cached_search(query: str, sort_by: str, retmax: int, articles: List[Dict]) -> None:
+    """Store the parsed articles of a search"""
+    key = (query, sort_by, retmax)
+    entry = (time.time(), [dict(article) for article in articles])
+
+    try:
+        with _lock:
+            remember(key, entry)
+            conn = get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO searches (query, sort, retmax, articles, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(entry[1]), entry[0])
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Could not write PubMed cache: %s", e)
+
+def clear() -> None:
+    """Drop every cached search, in memory and on disk"""
+    try:
+        with _lock:
+            _memory_cache.clear()
+            conn = get_connection()
+            conn.execute("DELETE FROM searches")
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Could not clear PubMed cache: %s", e)
+
+def remember(key, entry) -> None:
+    """Add an entry to the in-process LRU (caller holds the lock)"""
+    _memory_cache[key] = entry
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
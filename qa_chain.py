@@ -1,31 +1,123 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM, AutoModelForSeq2SeqLM, TextIteratorStreamer
+from transformers import StoppingCriteria, StoppingCriteriaList
 import torch
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+import hashlib
+import os
 import re
+from embedder import SearchHit
+
+# 8-bit weights on GPU (optional dependency: bitsandbytes)
+try:
+    from transformers import BitsAndBytesConfig
+    import bitsandbytes  # noqa: F401
+    BNB_AVAILABLE = True
+except ImportError:
+    BNB_AVAILABLE = False
 
 # Global pipeline to avoid reloading
 _qa_pipeline = None
 _summarizer_pipeline = None
 
+# INT8 summarizer weights (bitsandbytes on GPU, dynamic quantization on CPU)
+SUMMARIZER_INT8 = os.environ.get('MEDQUERY_INT8', '1') == '1'
+
+# Articles per summarizer forward pass (GPU memory allows larger batches)
+SUMMARIZER_BATCH_SIZE = 16 if torch.cuda.is_available() else 8
+
+# LRU of cleaned AI summaries keyed by sha1 of the summarizer input
+SUMMARY_CACHE_SIZE = 2048
+_summary_cache = OrderedDict()
+_summary_cache_lock = Lock()
+
+# Regexes used by the extractive/fallback summaries, compiled once
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+WHITESPACE_RE = re.compile(r'\s+')
+DIGIT_RE = re.compile(r'\d+')
+
+# Short factual questions are answered from the summaries alone, without the QA model
+SIMPLE_QUESTION_MAX_WORDS = 12
+EXPLANATORY_QUESTION_RE = re.compile(r'\b(why|how|compare|compared|versus|vs)\b')
+SIMPLE_ANSWER_INTRO = "Based on retrieved evidence:"
+
+# Answer length cap and per-source token budget for the "Details" part of the prompt
+ANSWER_MAX_NEW_TOKENS = 200
+PROMPT_DETAIL_MAX_TOKENS = 80
+
+# Keywords that indicate important information in an abstract sentence
+IMPORTANT_KEYWORDS = [
+    'objective', 'aim', 'purpose', 'goal',
+    'method', 'approach', 'design',
+    'result', 'finding', 'outcome', 'conclusion',
+    'significant', 'effective', 'treatment', 'therapy',
+    'recommendation', 'guideline', 'protocol'
+]
+# Single alternation so each sentence is scanned once instead of once per keyword
+IMPORTANT_KEYWORDS_RE = re.compile('|'.join(map(re.escape, IMPORTANT_KEYWORDS)))
+
+# Background model loading (weights load while the first query is typed/retrieved)
+_model_loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+_load_futures = {}
+_load_futures_lock = Lock()
+
+def model_dtype() -> torch.dtype:
+    """
+    Inference dtype for the current device
+    
+    bf16 on Ampere/Hopper (compute capability 8+) has fp16's bandwidth savings
+    without its overflow in BART attention; older GPUs use fp16, CPU fp32.
+    """
+    if not torch.cuda.is_available():
+        return torch.float32
+    if torch.cuda.get_device_capability()[0] >= 8:
+        return torch.bfloat16
+    return torch.float16
+
+def load_in_background(loader) -> Future:
+    """
+    Start a model loader on the background pool, or return the running load
+    
+    A load that failed is resubmitted on the next call so transient errors
+    (e.g. a network hiccup while downloading weights) are retried.
+    """
+    with _load_futures_lock:
+        future = _load_futures.get(loader)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _model_loader.submit(loader)
+            _load_futures[loader] = future
+        return future
+
 def get_qa_pipeline():
+    """Get the QA pipeline, waiting for the background load if it is still running"""
+    return load_in_background(load_qa_pipeline).result()
+
+def get_summarizer_pipeline():
+    """Get the summarization pipeline, waiting for the background load if it is still running"""
+    return load_in_background(load_summarizer_pipeline).result()
+
+def load_qa_pipeline():
     """Get or create the QA pipeline with a lightweight model"""
     global _qa_pipeline
     if _qa_pipeline is None:
         print("🔄 Loading language model...")
         
-        # Use a smaller, more manageable model
-        model_name = "microsoft/DialoGPT-medium"
+        # Instruction-tuned seq2seq model: ~77M params vs 355M for DialoGPT-medium,
+        # and trained to answer from a given context rather than chit-chat
+        model_name = "google/flan-t5-small"
         
         try:
             device = 0 if torch.cuda.is_available() else -1
             _qa_pipeline = pipeline(
-                "text-generation", 
-                model=model_name, 
-                device=device,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                max_length=1024
+                "text2text-generation",
+                model=load_seq2seq_model(model_name, model_dtype()),
+                tokenizer=AutoTokenizer.from_pretrained(model_name),
+                device=device
             )
             print(f"✅ Language model loaded on {'GPU' if device == 0 else 'CPU'}")
+            _qa_pipeline = compile_pipeline_model(_qa_pipeline)
             
         except Exception as e:
             print(f"⚠️ Error loading {model_name}, falling back to distilgpt2: {e}")
@@ -38,7 +130,109 @@ def get_qa_pipeline():
             
     return _qa_pipeline
 
-def get_summarizer_pipeline():
+def generation_pad_token_id(tokenizer) -> int:
+    """Pad token for generate(): the tokenizer's own, or EOS for GPT-style models without one"""
+    return tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+class StopOnText(StoppingCriteria):
+    """
+    Stop generation once the newly generated text contains stop_text
+    
+    Only the last few generated tokens are decoded per step, and the prompt
+    is excluded so a stop string inside it never ends generation early.
+    """
+    
+    def __init__(self, tokenizer, stop_text: str, window: int = 8):
+        self.tokenizer = tokenizer
+        self.stop_text = stop_text
+        self.window = window
+        self.start_length = None
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self.start_length is None:
+            # First call happens after one new token has been appended
+            self.start_length = input_ids.shape[1] - 1
+        start = max(self.start_length, input_ids.shape[1] - self.window)
+        tails = self.tokenizer.batch_decode(input_ids[:, start:], skip_special_tokens=True)
+        return torch.tensor([self.stop_text in tail for tail in tails], device=input_ids.device)
+
+def answer_generation_kwargs(pipeline) -> Dict:
+    """
+    Decoding settings for answer generation
+    
+    Greedy decoding with a 200-token cap and a repetition penalty; generation
+    also stops at the first blank line after the answer.
+    """
+    return dict(
+        max_new_tokens=ANSWER_MAX_NEW_TOKENS,
+        do_sample=False,
+        num_beams=1,
+        repetition_penalty=1.15,
+        pad_token_id=generation_pad_token_id(pipeline.tokenizer),
+        stopping_criteria=StoppingCriteriaList([StopOnText(pipeline.tokenizer, "\n\n")]),
+        truncation=True
+    )
+
+def compile_pipeline_model(pipe):
+    """
+    Compile a pipeline model's forward with torch.compile (CUDA only)
+    
+    reduce-overhead mode replays captured CUDA graphs, removing per-kernel
+    launch overhead at small batch sizes. forward is compiled rather than the
+    module because generate() calls the model's own forward internally.
+    Opt-in with MEDQUERY_TORCH_COMPILE=1: without a static KV cache every
+    decode step has a new sequence length, so each shape recompiles and
+    captures a new graph.
+    """
+    if pipe is None or not torch.cuda.is_available() or os.environ.get('MEDQUERY_TORCH_COMPILE', '0') != '1':
+        return pipe
+    
+    try:
+        pipe.model.forward = torch.compile(pipe.model.forward, mode="reduce-overhead", fullgraph=False)
+        print("⚡ Model compiled with torch.compile (reduce-overhead)")
+    except Exception as e:
+        print(f"⚠️ torch.compile failed, using eager model: {e}")
+    return pipe
+
+def run_inference(pipe, *args, **kwargs):
+    """Call a HF pipeline with autograd disabled (no graph or grad bookkeeping)"""
+    with torch.inference_mode():
+        return pipe(*args, **kwargs)
+
+def load_seq2seq_model(model_name: str, dtype: torch.dtype, int8: bool = False):
+    """
+    Load a seq2seq model in eval mode with PyTorch's fused SDPA attention
+    
+    Falls back to the eager attention implementation on transformers/torch
+    versions (or architectures) without SDPA support. With int8=True the
+    weights are 8-bit: bitsandbytes LLM.int8 on GPU (when installed, the model
+    is then placed by accelerate) or dynamic qint8 Linear layers on CPU.
+    """
+    kwargs = dict(torch_dtype=dtype)
+    if int8 and torch.cuda.is_available() and BNB_AVAILABLE:
+        kwargs.update(quantization_config=BitsAndBytesConfig(load_in_8bit=True), device_map="auto")
+    
+    try:
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, attn_implementation="sdpa", **kwargs)
+    except (ValueError, ImportError, TypeError) as e:
+        print(f"⚠️ SDPA attention unavailable for {model_name}, using eager attention: {e}")
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, **kwargs)
+    model.eval()
+    
+    if int8 and not torch.cuda.is_available():
+        try:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            print(f"🗜️ {model_name} quantized to int8 (dynamic)")
+        except Exception as e:
+            print(f"⚠️ Dynamic quantization failed, using fp32 weights: {e}")
+    return model
+
+def summarization_pipeline(model, model_name: str, device: int):
+    """Wrap a loaded summarizer model; accelerate-placed (8-bit) models keep their placement"""
+    placement = {} if getattr(model, 'hf_device_map', None) else {'device': device}
+    return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_name), **placement)
+
+def load_summarizer_pipeline():
     """Get or create the summarization pipeline"""
     global _summarizer_pipeline
     if _summarizer_pipeline is None:
@@ -47,23 +241,22 @@ def get_summarizer_pipeline():
         try:
             # Use BART for summarization (good balance of quality and speed)
             device = 0 if torch.cuda.is_available() else -1
-            _summarizer_pipeline = pipeline(
-                "summarization",
-                model="facebook/bart-large-cnn",
-                device=device,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
-            )
+            model_name = "facebook/bart-large-cnn"
+            model = load_seq2seq_model(model_name, model_dtype(), int8=SUMMARIZER_INT8)
+            _summarizer_pipeline = summarization_pipeline(model, model_name, device)
             print(f"✅ Summarization model loaded on {'GPU' if device == 0 else 'CPU'}")
+            if not getattr(model, 'is_loaded_in_8bit', False):
+                # bitsandbytes kernels don't go through torch.compile
+                _summarizer_pipeline = compile_pipeline_model(_summarizer_pipeline)
             
         except Exception as e:
             print(f"⚠️ Error loading BART, trying smaller model: {e}")
             try:
                 # Fallback to smaller model
-                _summarizer_pipeline = pipeline(
-                    "summarization",
-                    model="sshleifer/distilbart-cnn-12-6",
-                    device=-1  # Force CPU for stability
-                )
+                model_name = "sshleifer/distilbart-cnn-12-6"
+                # Force CPU for stability
+                model = load_seq2seq_model(model_name, torch.float32, int8=SUMMARIZER_INT8 and not torch.cuda.is_available())
+                _summarizer_pipeline = summarization_pipeline(model, model_name, -1)
                 print("✅ Fallback summarization model loaded")
             except Exception as e2:
                 print(f"⚠️ Summarization model failed, will use extractive summarization: {e2}")
@@ -71,77 +264,152 @@ def get_summarizer_pipeline():
                 
     return _summarizer_pipeline
 
-def generate_article_summaries(contexts: List[Dict]) -> List[Dict]:
+def generate_article_summaries(contexts: List[SearchHit]) -> List[SearchHit]:
     """
     Generate summaries for each article
+    
+    Summaries are set on the given SearchHit objects in place; the same list
+    is returned for convenience.
     """
     print("📝 Generating article summaries...")
     
-    enhanced_contexts = []
     summarizer = get_summarizer_pipeline()
     
-    for i, ctx in enumerate(contexts, 1):
+    # Summarize all articles in one batched model call instead of one call per article
+    if summarizer is not None:
+        print(f"🔄 Summarizing {len(contexts)} articles in one batch...")
+        ai_summaries = generate_ai_summaries(
+            [ctx.text for ctx in contexts],
+            [ctx.metadata['title'] for ctx in contexts],
+            summarizer
+        )
+    else:
+        ai_summaries = [None] * len(contexts)
+    
+    for i, (ctx, summary) in enumerate(zip(contexts, ai_summaries), 1):
         try:
-            print(f"🔄 Summarizing article {i}/{len(contexts)}...")
-            
             # Get article content
-            title = ctx['metadata']['title']
-            abstract = ctx['text']
+            title = ctx.metadata['title']
+            abstract = ctx.text
             
-            # Generate summary
-            if summarizer is not None:
-                summary = generate_ai_summary(abstract, title, summarizer)
-            else:
+            # Fall back to extractive summarization when no AI summary is available
+            if summary is None:
                 summary = generate_extractive_summary(abstract, title)
             
             # Add summary to context
-            enhanced_ctx = ctx.copy()
-            enhanced_ctx['summary'] = summary
-            enhanced_contexts.append(enhanced_ctx)
+            ctx.summary = summary
             
         except Exception as e:
             print(f"⚠️ Error summarizing article {i}: {e}")
-            # Add context without summary
-            enhanced_ctx = ctx.copy()
-            enhanced_ctx['summary'] = generate_fallback_summary(ctx['text'], ctx['metadata']['title'])
-            enhanced_contexts.append(enhanced_ctx)
+            ctx.summary = generate_fallback_summary(ctx.text, ctx.metadata['title'])
     
     print("✅ Article summaries generated")
-    return enhanced_contexts
+    return contexts
+
+def generate_ai_summaries(abstracts: List[str], titles: List[str], summarizer) -> List[Optional[str]]:
+    """
+    Generate AI-powered summaries for several articles in a single model call
+    
+    Summaries are cached by a hash of the "title. abstract" input, so only articles
+    not seen before are sent to the model. Returns one cleaned summary per
+    article, or None where summarization failed (callers fall back to
+    extractive summaries).
+    """
+    # Prepare text for summarization
+    # Use both title and abstract for context
+    input_texts = [f"{title}. {abstract}" for abstract, title in zip(abstracts, titles)]
+    keys = [hashlib.sha1(text.encode('utf-8')).digest() for text in input_texts]
+    
+    with _summary_cache_lock:
+        summaries = [_summary_cache.get(key) for key in keys]
+        for key, summary in zip(keys, summaries):
+            if summary is not None:
+                _summary_cache.move_to_end(key)
+    
+    miss_idx = [i for i, summary in enumerate(summaries) if summary is None]
+    if not miss_idx:
+        return summaries
+    
+    new_summaries = summarize_batch([input_texts[i] for i in miss_idx], summarizer)
+    
+    with _summary_cache_lock:
+        for i, summary in zip(miss_idx, new_summaries):
+            summaries[i] = summary
+            if summary is not None:
+                _summary_cache[keys[i]] = summary
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    
+    return summaries
 
-def generate_ai_summary(abstract: str, title: str, summarizer) -> str:
+def summarize_batch(input_texts: List[str], summarizer) -> List[Optional[str]]:
     """
-    Generate AI-powered summary using transformer model
+    Summarize prepared inputs in batched model calls
+    
+    If the batched call fails each input is retried on its own; inputs that
+    still fail get None.
     """
     try:
-        # Prepare text for summarization
-        # Use both title and abstract for context
-        input_text = f"{title}. {abstract}"
-        
-        # Limit input length for the model
-        max_input_length = 1024
-        if len(input_text) > max_input_length:
-            input_text = input_text[:max_input_length]
-        
-        # Generate summary
-        summary_result = summarizer(
-            input_text,
-            max_length=100,  # Concise summary
-            min_length=30,
-            do_sample=False,
-            truncation=True
-        )
-        
-        summary = summary_result[0]['summary_text']
-        
-        # Clean up the summary
-        summary = clean_summary_text(summary)
-        
-        return summary
-        
+        return generate_summaries(input_texts, summarizer)
     except Exception as e:
-        print(f"⚠️ AI summarization failed: {e}")
-        return generate_extractive_summary(abstract, title)
+        print(f"⚠️ Batched AI summarization failed, retrying per article: {e}")
+    
+    summaries = []
+    for input_text in input_texts:
+        try:
+            summaries.append(generate_summaries([input_text], summarizer)[0])
+        except Exception as e:
+            print(f"⚠️ AI summarization failed: {e}")
+            summaries.append(None)
+    return summaries
+
+def stage_on_device(inputs, device: torch.device):
+    """
+    Move tokenized inputs to the model device
+    
+    On CUDA the CPU tensors are pinned first so the copy is a single
+    asynchronous DMA transfer (non_blocking) instead of a pageable memcpy.
+    """
+    if device.type != 'cuda':
+        return inputs
+    return {name: tensor.pin_memory().to(device, non_blocking=True) for name, tensor in inputs.items()}
+
+def generate_summaries(input_texts: List[str], summarizer) -> List[str]:
+    """
+    Tokenize once and generate directly with the summarizer's model
+    
+    Inputs are truncated by tokens at the model's position limit (not by
+    characters), and the token ids go straight to generate() instead of being
+    re-tokenized inside the pipeline.
+    """
+    tokenizer, model = summarizer.tokenizer, summarizer.model
+    max_tokens = min(tokenizer.model_max_length, model.config.max_position_embeddings)
+    prefix = getattr(model.config, 'prefix', None) or ""
+    
+    # Tokenize every batch up front so all host->device copies are queued
+    # before the first generate() call rather than between batches
+    batches = [
+        stage_on_device(tokenizer([prefix + text for text in input_texts[start:start + SUMMARIZER_BATCH_SIZE]],
+                                  truncation=True, max_length=max_tokens,
+                                  padding=True, return_tensors="pt"), model.device)
+        for start in range(0, len(input_texts), SUMMARIZER_BATCH_SIZE)
+    ]
+    
+    summaries = []
+    for inputs in batches:
+        with torch.inference_mode():
+            output_ids = model.generate(
+                **inputs,
+                max_length=100,  # Concise summary
+                min_length=30,
+                do_sample=False,
+                num_beams=1,  # Greedy; bart-large-cnn's generation config defaults to 4 beams
+                length_penalty=1.0
+            )
+        
+        summaries.extend(clean_summary_text(text)
+                         for text in tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+    return summaries
 
 def generate_extractive_summary(abstract: str, title: str) -> str:
     """
@@ -149,7 +417,7 @@ def generate_extractive_summary(abstract: str, title: str) -> str:
     """
     try:
         # Split abstract into sentences
-        sentences = re.split(r'[.!?]+', abstract)
+        sentences = SENTENCE_SPLIT_RE.split(abstract)
         sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
         
         if not sentences:
@@ -158,26 +426,14 @@ def generate_extractive_summary(abstract: str, title: str) -> str:
         # Score sentences for importance
         scored_sentences = []
         
-        # Keywords that indicate important information
-        important_keywords = [
-            'objective', 'aim', 'purpose', 'goal',
-            'method', 'approach', 'design',
-            'result', 'finding', 'outcome', 'conclusion',
-            'significant', 'effective', 'treatment', 'therapy',
-            'recommendation', 'guideline', 'protocol'
-        ]
-        
         for sentence in sentences:
-            score = 0
             sentence_lower = sentence.lower()
             
-            # Score based on important keywords
-            for keyword in important_keywords:
-                if keyword in sentence_lower:
-                    score += 2
+            # Score based on important keywords (each distinct keyword counts once)
+            score = 2 * len(set(IMPORTANT_KEYWORDS_RE.findall(sentence_lower)))
             
             # Prefer sentences with numbers (often key findings)
-            if re.search(r'\d+', sentence):
+            if DIGIT_RE.search(sentence):
                 score += 1
             
             # Prefer longer sentences (more informative)
@@ -227,7 +483,7 @@ def generate_fallback_summary(text: str, title: str) -> str:
     Generate a simple fallback summary when other methods fail
     """
     # Extract first meaningful sentence from abstract
-    sentences = re.split(r'[.!?]+', text)
+    sentences = SENTENCE_SPLIT_RE.split(text)
     first_sentence = ""
     
     for sentence in sentences:
@@ -245,7 +501,7 @@ def clean_summary_text(summary: str) -> str:
     Clean and format summary text
     """
     # Remove extra whitespace
-    summary = re.sub(r'\s+', ' ', summary)
+    summary = WHITESPACE_RE.sub(' ', summary)
     
     # Fix punctuation
     summary = summary.replace(' .', '.')
@@ -261,7 +517,24 @@ def clean_summary_text(summary: str) -> str:
     
     return summary.strip()
 
-def generate_answer(question: str, contexts: List[Dict]) -> str:
+def needs_generated_answer(question: str) -> bool:
+    """
+    Whether a question warrants running the QA model
+    
+    Short factual questions are served by the article summaries; longer or
+    explanatory/comparative ones (why, how, compare...) get a generated answer.
+    """
+    return (len(question.split()) >= SIMPLE_QUESTION_MAX_WORDS
+            or EXPLANATORY_QUESTION_RE.search(question.lower()) is not None)
+
+def format_sources_answer(contexts: List[SearchHit]) -> str:
+    """Short evidence answer listing the retrieved sources (summaries are shown separately)"""
+    lines = [f"{SIMPLE_ANSWER_INTRO} the most relevant sources are listed below.\n"]
+    for i, ctx in enumerate(contexts, 1):
+        lines.append(f"{i}. **{ctx.metadata['title']}** (PMID: {ctx.metadata.get('pmid', 'Unknown')})")
+    return "\n".join(lines)
+
+def generate_answer(question: str, contexts: List[SearchHit]) -> str:
     """
     Generate an evidence-based answer using retrieved contexts with summaries
     """
@@ -271,40 +544,24 @@ def generate_answer(question: str, contexts: List[Dict]) -> str:
     print("🔄 Generating evidence-based answer...")
     
     try:
+        needs_answer = needs_generated_answer(question)
+        
+        # Start (or join) the QA model load so it overlaps with summarization
+        qa_future = load_in_background(load_qa_pipeline) if needs_answer else None
+        
         # First, generate summaries for each article
         enhanced_contexts = generate_article_summaries(contexts)
         
-        # Prepare context string with summaries
-        context_str = ""
-        for i, ctx in enumerate(enhanced_contexts, 1):
-            title = ctx['metadata']['title']
-            summary = ctx.get('summary', 'Summary not available')
-            text = ctx['text'][:300]  # Limit context length
-            pmid = ctx['metadata'].get('pmid', 'Unknown')
-            
-            context_str += f"\n[Source {i}] {title} (PMID: {pmid})\nSummary: {summary}\nDetails: {text}...\n"
+        if not needs_answer:
+            print("⚡ Simple question - answering from summaries")
+            return format_answer_with_summaries(SIMPLE_ANSWER_INTRO, enhanced_contexts)
         
         # Create prompt
-        prompt = f"""Based on the following medical literature with summaries, provide an evidence-based answer to the clinical question. Include specific citations and reasoning.
-
-Question: {question}
-
-Medical Literature with Summaries:
-{context_str}
-
-Evidence-Based Answer:"""
+        pipeline = qa_future.result()
+        prompt = build_answer_prompt(question, enhanced_contexts, pipeline.tokenizer, prompt_token_budget(pipeline))
         
         # Generate response
-        pipeline = get_qa_pipeline()
-        
-        response = pipeline(
-            prompt, 
-            max_new_tokens=350,
-            temperature=0.7,
-            do_sample=True,
-            pad_token_id=pipeline.tokenizer.eos_token_id,
-            truncation=True
-        )
+        response = run_inference(pipeline, prompt, **answer_generation_kwargs(pipeline))
         
         # Extract the generated answer
         generated_text = response[0]['generated_text']
@@ -319,23 +576,144 @@ Evidence-Based Answer:"""
         print(f"❌ Error generating answer: {e}")
         return generate_fallback_answer_with_summaries(question, contexts)
 
-def format_answer_with_summaries(answer: str, contexts: List[Dict]) -> str:
-    """Format the answer with article summaries and citations"""
+def generate_answer_stream(question: str, contexts: List[SearchHit], summarize: bool = True) -> Iterator[str]:
+    """
+    Stream an evidence-based answer, yielding text chunks as the model generates them
     
-    # Add article summaries section
-    summaries_section = "\n\n📚 **Article Summaries:**\n"
-    for i, ctx in enumerate(contexts, 1):
-        title = ctx['metadata']['title']
-        summary = ctx.get('summary', 'Summary not available')
-        url = ctx['metadata']['url']
-        
-        summaries_section += f"\n**{i}. {title}**\n"
-        summaries_section += f"   💡 *{summary}*\n"
-        summaries_section += f"   🔗 {url}\n"
+    With summarize=False the answer is generated straight from the article text
+    and no summaries section is appended, so callers can produce summaries
+    separately (see generate_article_summaries) without delaying the first token.
+    """
+    if not contexts:
+        yield "❌ No relevant evidence found to answer this question."
+        return
+    
+    print("🔄 Streaming evidence-based answer...")
     
-    return answer + summaries_section
+    if not needs_generated_answer(question):
+        print("⚡ Simple question - answering from summaries")
+        if summarize:
+            yield format_answer_with_summaries(SIMPLE_ANSWER_INTRO, generate_article_summaries(contexts))
+        else:
+            yield format_sources_answer(contexts)
+        return
+    
+    try:
+        # Start (or join) the QA model load so it overlaps with summarization
+        qa_future = load_in_background(load_qa_pipeline)
+        enhanced_contexts = generate_article_summaries(contexts) if summarize else contexts
+        pipeline = qa_future.result()
+        prompt = build_answer_prompt(question, enhanced_contexts, pipeline.tokenizer, prompt_token_budget(pipeline))
+    except Exception as e:
+        print(f"❌ Error preparing answer: {e}")
+        yield generate_fallback_answer_with_summaries(question, contexts)
+        return
+    
+    streamer = TextIteratorStreamer(pipeline.tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+    
+    def run_generation():
+        try:
+            # inference_mode is thread-local, so it is entered inside the worker
+            run_inference(pipeline, prompt, streamer=streamer, **answer_generation_kwargs(pipeline))
+        except Exception as e:
+            errors.append(e)
+            streamer.end()  # Unblock the consumer loop
+    
+    # Generation runs in a worker thread and pushes decoded text into the streamer
+    thread = Thread(target=run_generation, daemon=True)
+    thread.start()
+    
+    streamed_any = False
+    for chunk in streamer:
+        streamed_any = streamed_any or bool(chunk.strip())
+        yield chunk
+    thread.join()
+    
+    if errors and not streamed_any:
+        print(f"❌ Error generating answer: {errors[0]}")
+        yield generate_fallback_answer_with_summaries(question, contexts)
+        return
+    
+    if summarize:
+        yield format_summaries_section(enhanced_contexts)
+
+def build_answer_prompt(question: str, contexts: List[SearchHit], tokenizer=None,
+                        max_tokens: Optional[int] = None) -> str:
+    """
+    Build the QA prompt from (optionally summarized) contexts
+    
+    Without a tokenizer each source's details are cut to 300 characters. With
+    one, the details are cut by tokens so the whole prompt fits max_tokens and
+    the model-side truncation never drops the trailing answer cue.
+    """
+    if tokenizer is None or max_tokens is None:
+        return format_answer_prompt(question, contexts, [ctx.text[:300] for ctx in contexts])  # Limit context length
+    
+    # Tokens left for details once the fixed parts of the prompt are counted
+    fixed_tokens = len(tokenizer(format_answer_prompt(question, contexts, [""] * len(contexts)))['input_ids'])
+    per_source = min(PROMPT_DETAIL_MAX_TOKENS, max(0, (max_tokens - fixed_tokens) // max(1, len(contexts))))
+    
+    details = [
+        tokenizer.decode(ids[:per_source], skip_special_tokens=True)
+        for ids in tokenizer([ctx.text for ctx in contexts], add_special_tokens=False)['input_ids']
+    ]
+    return format_answer_prompt(question, contexts, details)
+
+def format_answer_prompt(question: str, contexts: List[SearchHit], details: List[str]) -> str:
+    """Assemble the QA prompt text from contexts and their (already trimmed) details"""
+    
+    # Prepare context string with summaries
+    parts = []
+    for i, (ctx, text) in enumerate(zip(contexts, details), 1):
+        title = ctx.metadata['title']
+        pmid = ctx.metadata.get('pmid', 'Unknown')
+        
+        parts.append(f"\n[Source {i}] {title} (PMID: {pmid})\n")
+        if ctx.summary is not None:
+            parts.append(f"Summary: {ctx.summary}\n")
+        parts.append(f"Details: {text}...\n")
+    context_str = "".join(parts)
+    
+    return f"""Based on the following medical literature with summaries, provide an evidence-based answer to the clinical question. Include specific citations and reasoning.
+
+Question: {question}
 
-def generate_fallback_answer_with_summaries(question: str, contexts: List[Dict]) -> str:
+Medical Literature with Summaries:
+{context_str}
+
+Evidence-Based Answer:"""
+
+def prompt_token_budget(pipeline) -> int:
+    """
+    Maximum prompt length in tokens for the QA model
+    
+    Decoder-only models share their context window between the prompt and
+    the generated answer, so the answer's max_new_tokens is reserved there.
+    """
+    limit = min(pipeline.tokenizer.model_max_length, 1024)
+    if not pipeline.model.config.is_encoder_decoder:
+        limit -= ANSWER_MAX_NEW_TOKENS
+    return limit
+
+def format_answer_with_summaries(answer: str, contexts: List[SearchHit]) -> str:
+    """Format the answer with article summaries and citations"""
+    return answer + format_summaries_section(contexts)
+
+def format_summaries_section(contexts: List[SearchHit]) -> str:
+    """Format the article summaries and citations appended below an answer"""
+    return "\n\n📚 **Article Summaries:**\n" + "".join(format_source_entries(contexts))
+
+def format_source_entries(contexts: List[SearchHit]) -> List[str]:
+    """One title/summary/link block per article"""
+    return [
+        f"\n**{i}. {ctx.metadata['title']}**\n"
+        f"   💡 *{ctx.summary or 'Summary not available'}*\n"
+        f"   🔗 {ctx.metadata['url']}\n"
+        for i, ctx in enumerate(contexts, 1)
+    ]
+
+def generate_fallback_answer_with_summaries(question: str, contexts: List[SearchHit]) -> str:
     """Generate a fallback answer with summaries when main pipeline fails"""
     
     print("🔄 Generating fallback answer with summaries...")
@@ -343,29 +721,25 @@ def generate_fallback_answer_with_summaries(question: str, contexts: List[Dict])
     # Generate summaries even for fallback
     enhanced_contexts = generate_article_summaries(contexts)
     
-    answer = f"""Based on the retrieved medical literature, here are the key findings relevant to: "{question}"
+    parts = [f"""Based on the retrieved medical literature, here are the key findings relevant to: "{question}"
 
 **Summary of Evidence:**
-"""
-    
-    for i, ctx in enumerate(enhanced_contexts, 1):
-        summary = ctx.get('summary', 'Summary not available')
-        answer += f"\n{i}. {summary}\n"
+"""]
+    parts.extend(f"\n{i}. {ctx.summary or 'Summary not available'}\n"
+                 for i, ctx in enumerate(enhanced_contexts, 1))
     
     # Add detailed sources
-    answer += "\n\n📚 **Detailed Sources:**\n"
-    for i, ctx in enumerate(enhanced_contexts, 1):
-        title = ctx['metadata']['title']
-        url = ctx['metadata']['url']
-        summary = ctx.get('summary', 'Summary not available')
-        
-        answer += f"\n**{i}. {title}**\n"
-        answer += f"   💡 *{summary}*\n"
-        answer += f"   🔗 {url}\n"
+    parts.append("\n\n📚 **Detailed Sources:**\n")
+    parts.extend(format_source_entries(enhanced_contexts))
     
-    answer += "\n⚠️ *This is a summary of available evidence. Please consult with healthcare professionals for clinical decisions.*"
+    parts.append("\n⚠️ *This is a summary of available evidence. Please consult with healthcare professionals for clinical decisions.*")
     
-    return answer
+    return "".join(parts)
+
+# Start loading both models at import so the first request doesn't pay for it
+if os.environ.get('MEDQUERY_PREWARM', '1') == '1':
+    load_in_background(load_summarizer_pipeline)
+    load_in_background(load_qa_pipeline)
 
 
 # for version 1 and 2
@@ -1,48 +1,163 @@
 # version 2: gives out 5 to 15 articles
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import time
-from typing import List, Dict, Tuple
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from pubmed_cache import get_cached_search, put_cached_search
+from sklearn.feature_extraction.text import CountVectorizer
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+import hashlib
+import re
+import threading
 
-def get_pubmed_articles(query: str, max_results: int = 5) -> List[Dict]:
+logger = logging.getLogger('medquery.retriever')
+
+# Rust-backed JSON parser for esearch responses when installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# libxml2-backed parser for efetch XML when installed
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+
+# Optional NCBI API key: raises the E-utilities limit from 3 to 10 requests/second
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")
+
+# Common medical phrases that should be preserved as units
+MEDICAL_PHRASES = [
+    "type 2 diabetes", "type 1 diabetes",
+    "first-line treatment", "second-line treatment",
+    "side effects", "adverse effects",
+    "contraindications", "drug interactions",
+    "ace inhibitors", "beta blockers",
+    "blood pressure", "heart failure",
+    "clinical trial", "systematic review",
+    "meta-analysis", "guidelines"
+]
+MEDICAL_PHRASES_RE = re.compile("(?=(" + "|".join(map(re.escape, MEDICAL_PHRASES)) + "))")
+
+# Individual important words (matched as whole query words)
+IMPORTANT_WORDS = frozenset([
+    "diabetes", "hypertension", "metformin", "insulin",
+    "treatment", "therapy", "medication", "drug",
+    "elderly", "pediatric", "pregnancy", "renal",
+    "cardiovascular", "nephropathy", "retinopathy"
+])
+
+# Question openers stripped from queries in one pass (longest alternative first)
+QUESTION_WORDS = [
+    "what are the", "what is the", "what are", "what is",
+    "how do", "how does", "how can", "how to",
+    "when should", "when do", "when is",
+    "why do", "why does", "why is",
+    "where do", "where does", "where is"
+]
+QUESTION_WORDS_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(QUESTION_WORDS, key=len, reverse=True))) + r")\b"
+)
+MEDICAL_STOPWORDS = frozenset(["a", "an", "the", "of", "at", "by"])
+
+# Relevance scoring only searches the start of each abstract (the full text is
+# kept for display and the LLM context)
+ABSTRACT_SCORED_MAX_CHARS = 1500
+
+# Relevance scores by (pmid, query hash), reused across repeat queries
+SCORE_CACHE_SIZE = 10000
+_score_cache = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+# Shared keep-alive session used when callers don't pass their own client
+_session = None
+
+def create_session() -> requests.Session:
+    """
+    Create a pooled keep-alive session for NCBI E-utilities
+    
+    The mounted adapter retries 429/5xx responses with exponential backoff
+    (1s, 2s, 4s), honouring Retry-After.
+    """
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'MedQuery/1.0'})
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """Get or create the module-level E-utilities session"""
+    global _session
+    if _session is None:
+        _session = create_session()
+    return _session
+
+def eutils_params(**params) -> Dict:
+    """E-utilities query parameters with the tool/email (and API key) NCBI asks for"""
+    params.update(tool="MedQuery", email="medquery@example.com")
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    return params
+
+def get_pubmed_articles(query: str, max_results: int = 5, client=None) -> List[Dict]:
     """
     Retrieve PubMed articles using improved matching strategy
+    
+    Args:
+        client: Optional HTTP client (e.g. a session from create_session) reused
+                for every E-utilities call; defaults to the module-level session
     """
-    print(f"➡️ Searching PubMed for: {query}")
+    logger.info("➡️ Searching PubMed for: %s", query)
     
     # Clean query for PubMed
     cleaned_query = clean_medical_query(query)
-    print(f"🔍 PubMed search query: {cleaned_query}")
+    logger.info("🔍 PubMed search query: %s", cleaned_query)
     
     # Strategy: Get more articles initially, then filter for best matches
     initial_fetch = min(max_results * 3, 15)  # Get 3x more articles to choose from
     
     # Step 1: Search with multiple strategies for better coverage
+    # Primary search (most relevant)
     all_articles = []
     
-    # Primary search - most relevant
-    articles_primary = search_pubmed_articles(cleaned_query, initial_fetch, "relevance")
+    articles_primary = search_pubmed_articles(cleaned_query, initial_fetch, "relevance", client)
     if articles_primary:
         all_articles.extend(articles_primary)
-        print(f"✅ Primary search: {len(articles_primary)} articles")
-    
-    # Secondary search - recent articles for current guidelines
-    if len(all_articles) < initial_fetch:
-        articles_recent = search_pubmed_articles(cleaned_query, 
-                                               initial_fetch - len(all_articles), 
-                                               "pub_date")
-        if articles_recent:
-            # Avoid duplicates
+        logger.info("✅ Primary search: %d articles", len(articles_primary))
+    
+    # Secondary search (recent, for current guidelines) - both searches use the
+    # same term, so it only pays for its round trips when primary was thin
+    if len(all_articles) < min(max_results * 2, initial_fetch):
+        try:
+            # Recent articles only fill the slots the primary search left open
             existing_pmids = {a['pmid'] for a in all_articles}
+            articles_recent = search_recent_articles(cleaned_query, initial_fetch, all_articles, client)
             new_articles = [a for a in articles_recent if a['pmid'] not in existing_pmids]
-            all_articles.extend(new_articles)
-            print(f"✅ Recent search: {len(new_articles)} new articles")
+            new_articles = new_articles[:initial_fetch - len(all_articles)]
+            if new_articles:
+                all_articles.extend(new_articles)
+                logger.info("✅ Recent search: %d new articles", len(new_articles))
+        except Exception as e:
+            logger.error("❌ Error in pub_date search: %s", e)
     
     if not all_articles:
-        print("❌ No articles found")
+        logger.warning("❌ No articles found")
         return []
     
-    print(f"📚 Total articles retrieved: {len(all_articles)}")
+    logger.info("📚 Total articles retrieved: %d", len(all_articles))
     
     # Step 2: Re-rank articles by query relevance using our own scoring
     scored_articles = score_articles_by_relevance(all_articles, query)
@@ -50,95 +165,218 @@ def get_pubmed_articles(query: str, max_results: int = 5) -> List[Dict]:
     # Step 3: Return top matches
     top_articles = scored_articles[:max_results]
     
-    print(f"🎯 Selected top {len(top_articles)} most relevant articles")
-    for i, article in enumerate(top_articles, 1):
-        print(f"   {i}. {article['title'][:60]}... (Score: {article.get('relevance_score', 0):.3f})")
+    logger.info("🎯 Selected top %d most relevant articles", len(top_articles))
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, article in enumerate(top_articles, 1):
+            logger.debug("   %d. %s... (Score: %.3f)", i, article['title'][:60], article.get('relevance_score', 0))
     
     return top_articles
 
-def search_pubmed_articles(query: str, max_results: int, sort_by: str) -> List[Dict]:
+def search_pubmed_articles(query: str, max_results: int, sort_by: str, client=None) -> List[Dict]:
     """
     Search PubMed with specific sorting strategy
+    
+    Parsed results are cached by (query, sort_by, max_results) for a day.
     """
-    search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    search_params = {
-        "db": "pubmed",
-        "term": query,
-        "retmode": "json",
-        "retmax": max_results,
-        "sort": sort_by,
-        "tool": "MedQuery",
-        "email": "medquery@example.com"
-    }
+    cached = get_cached_search(query, sort_by, max_results)
+    if cached is not None:
+        logger.info("💾 Cached %s search: %d articles", sort_by, len(cached))
+        return cached
     
     try:
-        # Search for article IDs
-        search_data = make_request_with_retry(search_url, search_params, f"search-{sort_by}")
-        if not search_data:
+        search_result = esearch_pubmed(query, max_results, sort_by, client)
+        if not search_result:
             return []
         
-        if 'esearchresult' not in search_data or not search_data['esearchresult']['idlist']:
-            return []
-        
-        article_ids = search_data['esearchresult']['idlist']
-        
-        # Fetch article details
-        fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-        fetch_params = {
-            "db": "pubmed",
-            "id": ",".join(article_ids),
-            "retmode": "xml",
-            "rettype": "abstract",
-            "tool": "MedQuery",
-            "email": "medquery@example.com"
-        }
-        
-        time.sleep(0.5)  # Rate limiting
-        
-        fetch_response = make_request_with_retry(fetch_url, fetch_params, f"fetch-{sort_by}", return_json=False)
-        if not fetch_response:
-            return []
-        
-        # Parse articles
-        articles = parse_pubmed_xml(fetch_response.text, article_ids)
+        articles = efetch_pubmed_articles(search_result['idlist'], sort_by, client, search_result)
+        if articles:
+            put_cached_search(query, sort_by, max_results, articles)
         return articles
         
     except Exception as e:
-        print(f"❌ Error in {sort_by} search: {e}")
+        logger.error("❌ Error in %s search: %s", sort_by, e)
+        return []
+
+def search_recent_articles(query: str, max_results: int, known_articles: List[Dict], client=None) -> List[Dict]:
+    """
+    Run the pub_date search, only fetching PMIDs not already in known_articles
+    
+    The full result list (known articles in pub_date order plus the newly
+    fetched ones) goes through the same cache as search_pubmed_articles.
+    """
+    cached = get_cached_search(query, "pub_date", max_results)
+    if cached is not None:
+        logger.info("💾 Cached pub_date search: %d articles", len(cached))
+        return cached
+    
+    search_result = esearch_pubmed(query, max_results, "pub_date", client)
+    if not search_result:
+        return []
+    
+    by_pmid = {a['pmid']: a for a in known_articles}
+    new_ids = [pmid for pmid in search_result['idlist'] if pmid not in by_pmid]
+    if new_ids:
+        by_pmid.update((a['pmid'], a) for a in efetch_pubmed_articles(new_ids, "pub_date", client))
+    
+    articles = [by_pmid[pmid] for pmid in search_result['idlist'] if pmid in by_pmid]
+    if articles:
+        put_cached_search(query, "pub_date", max_results, articles)
+    return articles
+
+def esearch_pubmed(query: str, max_results: int, sort_by: str, client=None) -> Optional[Dict]:
+    """
+    Run an esearch and return its result (PMID idlist plus history server keys)
+    
+    Returns None when the search failed or matched nothing.
+    """
+    search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+    search_params = eutils_params(
+        db="pubmed",
+        term=query,
+        retmode="json",
+        retmax=max_results,
+        sort=sort_by,
+        usehistory="y"
+    )
+    
+    search_data = make_request_with_retry(search_url, search_params, f"search-{sort_by}", client=client)
+    if not search_data:
+        return None
+    
+    if 'esearchresult' not in search_data or not search_data['esearchresult']['idlist']:
+        return None
+    
+    return search_data['esearchresult']
+
+def efetch_pubmed_articles(article_ids: List[str], sort_by: str, client=None,
+                           search_result: Optional[Dict] = None) -> List[Dict]:
+    """
+    Fetch and parse article details
+    
+    With a search_result covering exactly these IDs, the history server result
+    set is fetched instead of sending the ID list back.
+    """
+    if not article_ids:
         return []
+    
+    fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    if search_result and search_result.get('webenv') and search_result.get('querykey'):
+        fetch_params = eutils_params(
+            db="pubmed",
+            WebEnv=search_result['webenv'],
+            query_key=search_result['querykey'],
+            retstart=0,
+            retmax=len(article_ids),
+            retmode="xml",
+            rettype="abstract"
+        )
+    else:
+        fetch_params = eutils_params(
+            db="pubmed",
+            id=",".join(article_ids),
+            retmode="xml",
+            rettype="abstract"
+        )
+    
+    fetch_response = make_request_with_retry(fetch_url, fetch_params, f"fetch-{sort_by}", return_json=False, client=client)
+    if not fetch_response:
+        return []
+    
+    # Parse articles
+    return parse_pubmed_xml(fetch_response.text, article_ids)
 
 def score_articles_by_relevance(articles: List[Dict], original_query: str) -> List[Dict]:
     """
     Score articles by relevance to the original query using multiple factors
+    
+    Scores are cached per (PMID, query), so repeat queries only score new articles.
     """
-    print("🧮 Scoring articles for relevance...")
+    logger.debug("🧮 Scoring articles for relevance...")
     
-    query_lower = original_query.lower()
-    query_words = set(query_lower.split())
+    if not articles:
+        return []
     
-    # Important medical terms that should boost relevance
-    medical_terms = extract_medical_terms(query_lower)
+    query_lower = original_query.lower()
+    query_key = hashlib.blake2b(query_lower.encode('utf-8'), digest_size=8).hexdigest()
+    keys = [(article.get('pmid', 'Unknown'), query_key) for article in articles]
+    
+    with _score_cache_lock:
+        scores = [_score_cache.get(key) for key in keys]
+        for key, score in zip(keys, scores):
+            if score is not None:
+                _score_cache.move_to_end(key)
+    
+    misses = [i for i, score in enumerate(scores) if score is None]
+    if misses:
+        computed = compute_relevance_scores([articles[i] for i in misses], query_lower)
+        with _score_cache_lock:
+            for i, score in zip(misses, computed):
+                scores[i] = float(score)
+                if keys[i][0] != 'Unknown':
+                    _score_cache[keys[i]] = scores[i]
+            while len(_score_cache) > SCORE_CACHE_SIZE:
+                _score_cache.popitem(last=False)
+    
+    scores = np.array(scores)
+    
+    # Sort by relevance score (highest first, ties keep retrieval order)
+    order = np.argsort(-scores, kind='stable')
     
     scored_articles = []
-    
-    for article in articles:
-        score = calculate_relevance_score(article, query_words, medical_terms, query_lower)
-        article_copy = article.copy()
-        article_copy['relevance_score'] = score
+    for i in order:
+        article_copy = articles[i].copy()
+        article_copy['relevance_score'] = float(scores[i])
         scored_articles.append(article_copy)
     
-    # Sort by relevance score (highest first)
-    scored_articles.sort(key=lambda x: x['relevance_score'], reverse=True)
-    
     return scored_articles
 
-def calculate_relevance_score(article: Dict, query_words: set, medical_terms: List[str], full_query: str) -> float:
+def compute_relevance_scores(articles: List[Dict], query_lower: str) -> np.ndarray:
     """
-    Calculate relevance score for an article
+    Compute relevance scores for a batch of articles against a lowercased query
+    
+    Query-word matches for all articles are counted in one sparse matrix pass.
+    """
+    query_words = set(query_lower.split())
+    
+    # Important medical terms that should boost relevance
+    medical_terms = extract_medical_terms(query_lower)
+    
+    titles = [article.get('_title_lower') or article.get('title', '').lower() for article in articles]
+    abstracts = [article.get('_abstract_lower') or article.get('abstract', '')[:ABSTRACT_SCORED_MAX_CHARS].lower()
+                 for article in articles]
+    
+    scores = np.array([
+        phrase_match_score(title, abstract, medical_terms, query_lower)
+        for title, abstract in zip(titles, abstracts)
+    ])
+    
+    # Individual word matching (title matches weigh higher), with titles and
+    # abstracts counted against the query vocabulary in a single pass
+    title_tokens = [article.get('_title_tokens') or title.split()
+                    for article, title in zip(articles, titles)]
+    abstract_tokens = [article.get('_abstract_tokens') or abstract.split()
+                       for article, abstract in zip(articles, abstracts)]
+    matches = count_query_word_matches(title_tokens + abstract_tokens, query_words)
+    scores += 2.0 * matches[:len(articles)]
+    scores += 0.5 * matches[len(articles):]
+    
+    return scores
+
+def count_query_word_matches(token_lists: List[List[str]], query_words: set) -> np.ndarray:
+    """
+    Count the distinct query words present in each pre-tokenized (lowercased) text
     """
-    title = article.get('title', '').lower()
-    abstract = article.get('abstract', '').lower()
+    if not query_words:
+        return np.zeros(len(token_lists))
     
+    vectorizer = CountVectorizer(vocabulary=sorted(query_words), analyzer=list, binary=True)
+    matches = vectorizer.transform(token_lists)
+    return np.asarray(matches.sum(axis=1), dtype=np.float64).ravel()
+
+def phrase_match_score(title: str, abstract: str, medical_terms: Tuple[str, ...], full_query: str) -> float:
+    """
+    Score the phrase-level signals of one (lowercased) article
+    """
     score = 0.0
     
     # 1. Exact phrase matching (highest weight)
@@ -154,130 +392,76 @@ def calculate_relevance_score(article: Dict, query_words: set, medical_terms: Li
         elif term in abstract:
             score += 1.5
     
-    # 3. Individual word matching
-    title_words = set(title.split())
-    abstract_words = set(abstract.split())
-    
-    # Title word matches (higher weight)
-    title_matches = len(query_words.intersection(title_words))
-    score += title_matches * 2.0
-    
-    # Abstract word matches
-    abstract_matches = len(query_words.intersection(abstract_words))
-    score += abstract_matches * 0.5
-    
-    # 4. Completeness bonus (articles with abstracts are better)
+    # 3. Completeness bonus (articles with abstracts are better)
     if abstract and abstract != "no abstract available":
         score += 1.0
     
-    # 5. Recency bonus (prefer recent articles, assume recent if no clear date)
+    # 4. Recency bonus (prefer recent articles, assume recent if no clear date)
     # This could be enhanced with actual publication date parsing
     score += 0.5
     
     return score
 
-def extract_medical_terms(query: str) -> List[str]:
+@lru_cache(maxsize=1024)
+def extract_medical_terms(query: str) -> Tuple[str, ...]:
     """
-    Extract important medical terms from query
+    Extract important medical terms from query (cached; returns a tuple)
     """
-    # Common medical phrases that should be preserved as units
-    medical_phrases = [
-        "type 2 diabetes", "type 1 diabetes",
-        "first-line treatment", "second-line treatment",
-        "side effects", "adverse effects",
-        "contraindications", "drug interactions",
-        "ace inhibitors", "beta blockers",
-        "blood pressure", "heart failure",
-        "clinical trial", "systematic review",
-        "meta-analysis", "guidelines"
-    ]
-    
-    found_terms = []
-    for phrase in medical_phrases:
-        if phrase in query:
-            found_terms.append(phrase)
+    # One scan finds every phrase occurrence (lookahead keeps overlapping ones)
+    found_terms = set(MEDICAL_PHRASES_RE.findall(query))
     
     # Also add individual important words
-    important_words = [
-        "diabetes", "hypertension", "metformin", "insulin",
-        "treatment", "therapy", "medication", "drug",
-        "elderly", "pediatric", "pregnancy", "renal",
-        "cardiovascular", "nephropathy", "retinopathy"
-    ]
+    found_terms.update(IMPORTANT_WORDS.intersection(query.split()))
     
-    query_words = query.split()
-    for word in important_words:
-        if word in query_words:
-            found_terms.append(word)
-    
-    return list(set(found_terms))  # Remove duplicates
+    return tuple(found_terms)
+
+def parse_json(content: bytes):
+    """Decode a JSON response body (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
 
-def make_request_with_retry(url: str, params: dict, request_type: str, max_retries: int = 3, return_json: bool = True):
+def make_request_with_retry(url: str, params: dict, request_type: str, return_json: bool = True, client=None):
     """
-    Make HTTP request with retry logic for rate limiting
+    Make an E-utilities GET request
+    
+    Retries with exponential backoff on rate limiting (429) and 5xx errors are
+    done by the session's urllib3 Retry adapter (see create_session).
     """
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                wait_time = 2 ** attempt
-                print(f"⏳ Rate limited. Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}...")
-                time.sleep(wait_time)
-            
-            response = requests.get(url, params=params, timeout=20)
-            
-            if response.status_code == 429:
-                if attempt < max_retries - 1:
-                    continue
-                else:
-                    print(f"❌ Rate limit exceeded after {max_retries} attempts")
-                    return None
-            
-            response.raise_for_status()
-            
-            if return_json:
-                return response.json()
-            else:
-                return response
-                
-        except requests.RequestException as e:
-            if "429" in str(e):
-                if attempt < max_retries - 1:
-                    continue
-                else:
-                    print(f"❌ Rate limit exceeded for {request_type}: {e}")
-                    return None
-            else:
-                print(f"❌ Network error during {request_type}: {e}")
-                return None
-        except json.JSONDecodeError as e:
-            print(f"❌ Error parsing JSON response: {e}")
-            return None
+    http = client if client is not None else get_session()
     
-    return None
+    try:
+        response = http.get(url, params=params, timeout=20)
+        response.raise_for_status()
+        
+        if return_json:
+            return parse_json(response.content)
+        else:
+            return response
+        
+    except requests.exceptions.RetryError as e:
+        logger.error("❌ Rate limit exceeded for %s: %s", request_type, e)
+        return None
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses it
+        logger.error("❌ Error parsing JSON response: %s", e)
+        return None
+    except requests.RequestException as e:
+        logger.error("❌ Network error during %s: %s", request_type, e)
+        return None
 
+@lru_cache(maxsize=1024)
 def clean_medical_query(query: str) -> str:
     """
-    Clean medical query while preserving important terms
+    Clean medical query while preserving important terms (cached)
     """
     query_lower = query.lower().strip()
     
     # Remove question words but keep medical context
-    words_to_remove = [
-        "what are the", "what is the", "what are", "what is",
-        "how do", "how does", "how can", "how to",
-        "when should", "when do", "when is",
-        "why do", "why does", "why is",
-        "where do", "where does", "where is"
-    ]
-    
-    cleaned = query_lower
-    for phrase in words_to_remove:
-        cleaned = cleaned.replace(phrase, "")
+    cleaned = QUESTION_WORDS_RE.sub(" ", query_lower)
     
     # Keep important medical terms together
-    medical_stopwords = ["a", "an", "the", "of", "at", "by"]
     words = cleaned.split()
-    filtered_words = [word for word in words if word not in medical_stopwords or len(words) <= 3]
+    filtered_words = [word for word in words if word not in MEDICAL_STOPWORDS or len(words) <= 3]
     
     result = " ".join(filtered_words).strip()
     
@@ -288,18 +472,27 @@ def clean_medical_query(query: str) -> str:
     
     return result
 
+def release_element(elem) -> None:
+    """Free a parsed subtree (and, with lxml, the already-processed siblings)"""
+    elem.clear()
+    if LXML_AVAILABLE:
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
 def parse_pubmed_xml(xml_content: str, article_ids: List[str]) -> List[Dict]:
     """
     Parse PubMed XML response and extract article information
     """
-    import xml.etree.ElementTree as ET
-    
     articles = []
+    i = -1
     
     try:
-        root = ET.fromstring(xml_content)
-        
-        for i, article_elem in enumerate(root.findall('.//PubmedArticle')):
+        # Stream the response so only one <PubmedArticle> subtree is resident
+        for _, article_elem in ET.iterparse(BytesIO(xml_content.encode('utf-8')), events=('end',)):
+            if article_elem.tag != 'PubmedArticle':
+                continue
+            i += 1
+            
             try:
                 # Extract PMID
                 pmid_elem = article_elem.find('.//PMID')
@@ -340,26 +533,36 @@ def parse_pubmed_xml(xml_content: str, article_ids: List[str]) -> List[Dict]:
                     abstract = "No abstract available"
                 
                 url = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}"
+                title = title.strip() if title else "No title available"
+                title_lower = title.lower()
+                abstract_lower = abstract[:ABSTRACT_SCORED_MAX_CHARS].lower()
                 
                 articles.append({
-                    "title": title.strip() if title else "No title available",
+                    "title": title,
                     "abstract": abstract,
                     "url": url,
-                    "pmid": pmid
+                    "pmid": pmid,
+                    # Lowercased/tokenized once here so relevance scoring reuses them
+                    "_title_lower": title_lower,
+                    "_abstract_lower": abstract_lower,
+                    "_title_tokens": title_lower.split(),
+                    "_abstract_tokens": abstract_lower.split()
                 })
                 
             except Exception as e:
-                print(f"⚠️ Error parsing individual article: {e}")
-                continue
+                logger.warning("⚠️ Error parsing individual article: %s", e)
+            finally:
+                release_element(article_elem)
     
     except ET.ParseError as e:
-        print(f"❌ Error parsing XML: {e}")
+        logger.error("❌ Error parsing XML: %s", e)
         return []
     
     return articles
 
 # Test the improved matching
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("🧪 Testing improved article matching...")
     
     query = "What are the first-line treatments for type 2 diabetes?"
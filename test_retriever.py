@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("sklearn")
+
+import retriever
+
+
+def reference_score(article, query_words, medical_terms, full_query):
+    """Original per-article relevance score, kept as the ranking reference"""
+    title = article.get('title', '').lower()
+    abstract = article.get('abstract', '').lower()
+
+    score = 0.0
+    if full_query in title:
+        score += 10.0
+    elif full_query in abstract:
+        score += 5.0
+
+    for term in medical_terms:
+        if term in title:
+            score += 3.0
+        elif term in abstract:
+            score += 1.5
+
+    score += len(query_words & set(title.split())) * 2.0
+    score += len(query_words & set(abstract.split())) * 0.5
+
+    if abstract and abstract != "no abstract available":
+        score += 1.0
+    return score + 0.5
+
+
+def reference_ranking(articles, query):
+    query_lower = query.lower()
+    query_words = set(query_lower.split())
+    medical_terms = retriever.extract_medical_terms(query_lower)
+    scored = [(reference_score(a, query_words, medical_terms, query_lower), a['pmid']) for a in articles]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
+QUERIES = [
+    "first-line treatment type 2 diabetes",
+    "metformin side effects elderly",
+    "ace inhibitors contraindications renal",
+    "hypertension guidelines",
+    "antibiotic resistance pneumonia",
+]
+
+WORDS = ("diabetes type 2 metformin insulin elderly renal treatment therapy side effects "
+         "ace inhibitors hypertension guidelines blood pressure heart failure pneumonia "
+         "antibiotic resistance patients study trial outcome risk cohort the of in and").split()
+
+
+def random_articles(rng, trial, n=15):
+    articles = []
+    for i in range(n):
+        title = " ".join(rng.choices(WORDS, k=rng.randint(3, 10))).capitalize()
+        abstract = (" ".join(rng.choices(WORDS, k=rng.randint(10, 120)))
+                    if rng.random() > 0.1 else "No abstract available")
+        if rng.random() < 0.2:
+            abstract = f"{abstract} {rng.choice(QUERIES)}"
+        articles.append({"pmid": f"{trial}-{i}", "title": title, "abstract": abstract})
+    return articles
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_ranking_matches_reference_scorer(query):
+    rng = random.Random(query)
+    for trial in range(50):
+        articles = random_articles(rng, f"{query}-{trial}")
+
+        scored = retriever.score_articles_by_relevance(articles, query)
+        expected = reference_ranking(articles, query)
+
+        assert [a['pmid'] for a in scored] == [pmid for _, pmid in expected]
+        assert [a['relevance_score'] for a in scored] == pytest.approx([s for s, _ in expected])